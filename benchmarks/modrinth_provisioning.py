@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Benchmarks provisioning plugins/mods for N synthetic envs against a local fake Modrinth.
+
+Usage:
+    python -m src.common.benchmarks.modrinth_provisioning [--envs N] [--mods-per-env M] [--latency-ms L]
+
+Each env gets `--mods-per-env` projects out of `--projects`, overlapping between envs like real envs
+sharing common mods. Reports latency, request counts, and throughput for:
+    - resolving one project at a time with `query_for_mod()` (the old flow), if `--serial-baseline`
+    - bulk resolving with `resolve_pluginmods()`, cold then warm HTTP cache
+    - resolving the transitive dependency graph breadth-first, if `--dependencies-per-project` > 0
+    - downloading and installing the plan through the jar store, cold then warm store
+"""
+
+import argparse
+import tempfile
+import time
+
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from src.common import http_cache, modrinth, modrinth_backends
+from src.common.downloader import DownloadPipeline
+from src.common.environment import Env
+from src.common.jar_store import JarStore
+from src.common.modrinth_fake_server import FakeModrinthServer
+
+
+def make_definitions(
+    server: FakeModrinthServer, envs: int, mods_per_env: int, game_version: str
+) -> List[modrinth.PluginModDefinition]:
+    """Gives every env `mods_per_env` consecutive projects, each env's window shifted by half of it"""
+    project_ids = server.project_ids
+    definitions = []
+    for e in range(envs):
+        env = Env(f"env{e + 1}")
+        start = e * (mods_per_env // 2)
+        for m in range(mods_per_env):
+            definitions.append(
+                modrinth.PluginModDefinition(
+                    project_ids[(start + m) % len(project_ids)],
+                    game_version,
+                    server_type="fabric",
+                    env=env,
+                )
+            )
+    return definitions
+
+
+def timed(
+    label: str, server: FakeModrinthServer, fn: Callable, units: int, unit_name: str
+) -> Tuple[float, object]:
+    server.reset_stats()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+
+    stats = server.stats()
+    print(
+        f"{label:<28} {elapsed * 1000:>9.1f} ms  {stats['requests']:>5} requests  "
+        f"{units / elapsed:>9.1f} {unit_name}/s  {stats['bytes_served'] / elapsed / 1024 / 1024:>7.1f} MiB/s"
+    )
+    return elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--envs", type=int, default=10)
+    parser.add_argument("--mods-per-env", type=int, default=50)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--versions-per-project", type=int, default=200)
+    parser.add_argument("--jar-size", type=int, default=256 * 1024)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--dependencies-per-project", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--serial-baseline", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir, FakeModrinthServer(
+        num_projects=args.projects,
+        versions_per_project=args.versions_per_project,
+        jar_size=args.jar_size,
+        latency=args.latency_ms / 1000,
+        dependencies_per_project=args.dependencies_per_project,
+    ) as server:
+        tmp_path = Path(tmp_dir)
+        modrinth_backends.set_modrinth_backend(server.backend())
+        http_cache.configure_http_cache(db_path=tmp_path / "http.sqlite3")
+
+        definitions = make_definitions(
+            server, args.envs, args.mods_per_env, server.game_versions[0]
+        )
+        print(
+            f"{args.envs} envs x {args.mods_per_env} mods = {len(definitions)} definitions, "
+            f"{args.projects} projects, {args.latency_ms}ms simulated latency"
+        )
+
+        if args.serial_baseline:
+            timed(
+                "resolve (serial, cold)",
+                server,
+                lambda: [modrinth.query_for_mod(d) for d in definitions],
+                len(definitions),
+                "defs",
+            )
+            http_cache.configure_http_cache(db_path=tmp_path / "http-bulk.sqlite3")
+
+        _, plan = timed(
+            "resolve (bulk, cold)",
+            server,
+            lambda: modrinth.resolve_pluginmods(definitions),
+            len(definitions),
+            "defs",
+        )
+        timed(
+            "resolve (bulk, warm)",
+            server,
+            lambda: modrinth.resolve_pluginmods(definitions),
+            len(definitions),
+            "defs",
+        )
+
+        if args.dependencies_per_project:
+            http_cache.configure_http_cache(db_path=tmp_path / "http-deps.sqlite3")
+            _, resolution = timed(
+                "resolve (dependencies, cold)",
+                server,
+                lambda: modrinth.resolve_pluginmod_dependencies(definitions),
+                len(definitions),
+                "defs",
+            )
+            plan = resolution.plan
+            print(
+                f"dependency graph: {resolution.levels} levels, {len(plan.downloads)} installs, "
+                f"{len(resolution.conflicts)} conflicts, {len(resolution.cycles)} cycles"
+            )
+
+        store = JarStore(tmp_path / "jarstore")
+
+        def install_path(definition: modrinth.PluginModDefinition) -> Path:
+            return tmp_path / "envs" / definition.env.name / "mods"
+
+        def download():
+            result = modrinth.download_plan(
+                plan,
+                DownloadPipeline(max_workers=args.workers),
+                store,
+                install_path,
+            )
+            result.raise_for_errors()
+            return result
+
+        timed(
+            "download (cold store)", server, download, len(plan.downloads), "installs"
+        )
+        timed(
+            "download (warm store)", server, download, len(plan.downloads), "installs"
+        )
+
+        stats = store.stats()
+        print(
+            f"jar store: {stats['blobs']} blobs, {stats['bytes'] / 1024 / 1024:.1f} MiB "
+            f"for {len(plan.downloads)} installs"
+        )
+
+        modrinth_backends.set_modrinth_backend(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Compares the pure Python yaml loader/dumper against the libyaml backed ones we use.
+
+Usage:
+    python -m src.common.benchmarks.yaml_backend [path/to/some.yml] [--iterations N]
+
+If no path is given a synthetic paper-global.yml sized document is used.
+"""
+
+import argparse
+import timeit
+
+from pathlib import Path
+from typing import Callable, Dict
+
+import yaml  # type: ignore
+
+from src.common.config import yaml_backend
+
+
+def make_synthetic_yaml(sections: int = 20, keys_per_section: int = 15) -> str:
+    """Builds a nested yaml document roughly the size of a paper-global.yml
+
+    Args:
+        sections (int, optional): Number of top level sections. Defaults to 20.
+        keys_per_section (int, optional): Number of keys per nested mapping. Defaults to 15.
+
+    Returns:
+        str: Yaml content
+    """
+    data: Dict = {}
+    for s in range(sections):
+        section: Dict = {}
+        for k in range(keys_per_section):
+            section[f"key-{k}"] = {
+                "enabled": k % 2 == 0,
+                "value": k * 1.5,
+                "name": f"section-{s}-key-{k}",
+                "list": [f"item-{i}" for i in range(5)],
+                "unset": None,
+            }
+        data[f"section-{s}"] = section
+    return yaml.safe_dump(data, sort_keys=False)
+
+
+def time_it(label: str, fn: Callable, iterations: int) -> float:
+    elapsed = timeit.timeit(fn, number=iterations)
+    per_call_ms = elapsed / iterations * 1000
+    print(f"{label:<28} {per_call_ms:>9.3f} ms/call")
+    return per_call_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", nargs="?", type=Path)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    content = args.path.read_text() if args.path else make_synthetic_yaml()
+    data = yaml_backend.load_yaml(content)
+
+    print(f"libyaml available: {yaml_backend.HAS_LIBYAML}")
+    print(f"document size: {len(content)} bytes")
+
+    py_load = time_it(
+        "load (pure python)",
+        lambda: yaml.load(content, Loader=yaml.SafeLoader),
+        args.iterations,
+    )
+    c_load = time_it(
+        "load (yaml_backend)",
+        lambda: yaml_backend.load_yaml(content),
+        args.iterations,
+    )
+    py_dump = time_it(
+        "dump (pure python)",
+        lambda: yaml.dump(data, Dumper=yaml.SafeDumper, sort_keys=False),
+        args.iterations,
+    )
+    c_dump = time_it(
+        "dump (yaml_backend)",
+        lambda: yaml_backend.dump_yaml(data, sort_keys=False),
+        args.iterations,
+    )
+
+    print(f"load speedup: {py_load / c_load:.1f}x")
+    print(f"dump speedup: {py_dump / c_dump:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,146 @@
 #!/usr/bin/env python
 
+import os
 import yaml  # type: ignore
 from pathlib import Path
 
-from typing import Optional
+from typing import Callable, Dict, Optional
 
+from src.common.config.config_cache import ConfigCache
 from src.common.config.config_finder import ConfigFinder
-from src.common.config.config_node import ConfigNode
+from src.common.config.config_node import ConfigNode, hash_content
 from src.common.config.env_config import EnvConfig
+from src.common.config.persistent_cache import PersistentConfigCache
 from src.common.config.yaml_config import YamlConfig
 from src.common.config.toml_config import TomlConfig
+from src.common.helpers import log_exception
 
 
-__TOML_CONFIG: dict = {}
-__YAML_CONFIG: dict = {}
-__ENV_CONFIG: dict = {}
+__TOML_CONFIG: ConfigCache = ConfigCache()
+__YAML_CONFIG: ConfigCache = ConfigCache()
+__ENV_CONFIG: ConfigCache = ConfigCache()
 
+__PERSISTENT_CACHE: Optional[PersistentConfigCache] = None
 
-def load_toml_config(
-    config_path: Path,
-    no_cache: bool = False,
-) -> TomlConfig:
 
-    global __TOML_CONFIG
+def enable_persistent_config_cache(
+    cache_dir: Optional[Path] = None,
+    max_bytes: Optional[int] = None,
+) -> PersistentConfigCache:
+    """Opts in to caching parsed configs on disk, keyed by file content hash and parser version.
 
-    if (
-        config_path not in __TOML_CONFIG
-        or __TOML_CONFIG[config_path] is None
-        or no_cache
-    ):
-        try:
+    Once enabled, a cold process loading a config it (or another process) has parsed before skips the
+    parser entirely. Also enabled at import time if the `YC_CONFIG_CACHE_DIR` env var is set.
+
+    Args:
+        cache_dir (Optional[Path]): Where to store entries. Defaults to `persistent_cache.get_default_cache_dir()`
+        max_bytes (Optional[int]): Size bound of the cache dir. Defaults to `PersistentConfigCache.DEFAULT_MAX_BYTES`
+
+    Returns:
+        PersistentConfigCache: The enabled cache
+    """
+    global __PERSISTENT_CACHE
+
+    __PERSISTENT_CACHE = PersistentConfigCache(cache_dir, max_bytes)
+    return __PERSISTENT_CACHE
+
+
+def disable_persistent_config_cache():
+    global __PERSISTENT_CACHE
+
+    __PERSISTENT_CACHE = None
+
+
+def __read_config(config_cls: Callable) -> Callable[[Path], ConfigNode]:
+    def loader(config_path: Path) -> ConfigNode:
+        persistent_cache = __PERSISTENT_CACHE
+        if persistent_cache is None:
             with open(config_path, "r") as f:
-                __TOML_CONFIG[config_path] = TomlConfig(f.read())
+                return config_cls.from_file(f)
+
+        with open(config_path, "rb") as f:
+            content = f.read()
+
+        key = persistent_cache.get_key(content, config_cls.PARSER_VERSION)
+        data = persistent_cache.get(key)
+        if data is not None:
+            return config_cls.from_data(data, hash_content(content))
+
+        config = config_cls(content.decode("utf8"))
+        try:
+            persistent_cache.put(key, config.data)
         except:
-            log_exception()
+            log_exception(
+                message="Failed to write persistent config cache entry",
+                data={"config_path": config_path},
+            )
+        return config
 
-    return __TOML_CONFIG[config_path]
+    return loader
 
 
-def load_env_config(
+def __load_config(
+    cache: ConfigCache,
+    config_cls: Callable,
+    config_path: Path,
+    no_cache: bool,
+):
+    try:
+        return cache.get(config_path, __read_config(config_cls), no_cache=no_cache)
+    except:
+        log_exception(
+            message=f"Failed to load {config_cls.__name__}!",
+            data={"config_path": config_path},
+        )
+        raise
+
+
+def load_toml_config(
     config_path: Path,
     no_cache: bool = False,
-) -> EnvConfig:
-    global __ENV_CONFIG
+) -> TomlConfig:
+    return __load_config(__TOML_CONFIG, TomlConfig, config_path, no_cache)
 
-    if config_path not in __ENV_CONFIG or __ENV_CONFIG[config_path] is None or no_cache:
-        try:
-            with open(config_path, "r") as f:
-                __ENV_CONFIG[config_path] = EnvConfig(f.read())
-        except:
-            log_exception()
 
-    return __ENV_CONFIG[config_path]
+def load_env_config(
+    config_path: Path,
+    no_cache: bool = False,
+) -> EnvConfig:
+    return __load_config(__ENV_CONFIG, EnvConfig, config_path, no_cache)
 
 
 def load_yaml_config(
     config_path: Path,
     no_cache: bool = False,
 ) -> YamlConfig:
-    global __YAML_CONFIG
+    return __load_config(__YAML_CONFIG, YamlConfig, config_path, no_cache)
+
+
+def invalidate_config_caches(config_path: Optional[Path] = None):
+    """Drops `config_path` from every loader cache, or clears them entirely if `config_path` is None
+
+    Args:
+        config_path (Optional[Path]): Path to invalidate. Defaults to None.
+    """
+    for cache in (__TOML_CONFIG, __YAML_CONFIG, __ENV_CONFIG):
+        cache.invalidate(config_path)
+
+
+def get_config_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Returns hit/miss/reparse counters for each loader cache
+
+    Returns:
+        Dict[str, Dict[str, int]]: Stats keyed by config type ("toml", "yaml", "env"), plus "persistent" if enabled
+    """
+    stats = {
+        "toml": __TOML_CONFIG.stats(),
+        "yaml": __YAML_CONFIG.stats(),
+        "env": __ENV_CONFIG.stats(),
+    }
+    if __PERSISTENT_CACHE is not None:
+        stats["persistent"] = __PERSISTENT_CACHE.stats()
+    return stats
 
-    if (
-        config_path not in __YAML_CONFIG
-        or __YAML_CONFIG[config_path] is None
-        or no_cache
-    ):
-        try:
-            with open(config_path, "r") as f:
-                __YAML_CONFIG[config_path] = YamlConfig(f.read())
-        except:
-            log_exception()
 
-    return __YAML_CONFIG[config_path]
+if os.getenv("YC_CONFIG_CACHE_DIR"):
+    enable_persistent_config_cache(Path(os.environ["YC_CONFIG_CACHE_DIR"]))
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+import os
+import threading
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Any
+
+from src.common.logger_setup import logger
+
+StatKey = Tuple[int, int, int]
+
+
+def normalize_path(config_path: Path) -> Path:
+    """Returns the absolute form of `config_path` so equivalent paths share a cache entry
+
+    Args:
+        config_path (Path): Path to normalize
+
+    Returns:
+        Path: Absolute path
+    """
+    return Path(os.path.abspath(config_path))
+
+
+def get_stat_key(config_path: Path) -> StatKey:
+    """Returns the `(st_mtime_ns, st_size, st_ino)` triple we use to detect file changes
+
+    Args:
+        config_path (Path): Path to stat
+
+    Returns:
+        StatKey: Tuple of mtime in ns, size, and inode
+    """
+    st = os.stat(config_path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class _InFlightLoad:
+    """A load in progress that other threads can wait on"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+    def finish(self, result: Any):
+        self.result = result
+        self.done.set()
+
+    def fail(self, error: BaseException):
+        self.error = error
+        self.done.set()
+
+    def wait(self) -> Any:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class ConfigCache:
+    """Bounded LRU cache of parsed configs, validated against the file's stat info.
+
+    Every lookup costs a single `os.stat()`. The file is only re-read and re-parsed when its
+    `(st_mtime_ns, st_size, st_ino)` differs from what we saw when we last parsed it.
+
+    Safe to share between threads. Cached configs are shared between every caller, so treat them as
+    read-only snapshots.
+    """
+
+    DEFAULT_MAX_SIZE = 256
+
+    max_size: int
+    hits: int
+    misses: int
+    reparses: int
+    waits: int
+
+    _entries: "OrderedDict[Path, Tuple[StatKey, Any]]"
+    _inflight: Dict[Path, _InFlightLoad]
+    _lock: threading.Lock
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size if max_size is not None else self.DEFAULT_MAX_SIZE
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, config_path: Path):
+        return normalize_path(config_path) in self._entries
+
+    def get(
+        self,
+        config_path: Path,
+        loader: Callable[[Path], Any],
+        no_cache: bool = False,
+    ) -> Any:
+        """Returns the parsed config at `config_path`, calling `loader` only if the file changed.
+
+        Cached entries are read without taking the lock. On a miss, loading is single-flight per path:
+        the first thread calls `loader` while any others asking for the same path wait for (and share)
+        its result, or its exception.
+
+        Args:
+            config_path (Path): Path to the config file
+            loader (Callable[[Path], Any]): Callback that reads and parses `config_path`
+            no_cache (bool, optional): Forces a reparse even if the file looks unchanged. Defaults to False.
+
+        Returns:
+            Any: Whatever `loader` returned for this version of the file
+        """
+        config_path = normalize_path(config_path)
+        stat_key = get_stat_key(config_path)
+
+        if not no_cache:
+            entry = self._entries.get(config_path)
+            if entry is not None and entry[0] == stat_key:
+                self.hits += 1
+                try:
+                    self._entries.move_to_end(config_path)
+                except KeyError:
+                    pass  # Evicted by another thread since we looked it up
+                return entry[1]
+
+        with self._lock:
+            entry = self._entries.get(config_path)
+            if entry is not None and not no_cache and entry[0] == stat_key:
+                # Loaded by another thread while we waited for the lock
+                self.hits += 1
+                return entry[1]
+
+            flight = self._inflight.get(config_path)
+            is_leader = flight is None
+            if is_leader:
+                flight = _InFlightLoad()
+                self._inflight[config_path] = flight
+
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self.reparses += 1
+                    logger.debug(f"Config '{config_path}' changed on disk - reparsing")
+            else:
+                self.waits += 1
+
+        if not is_leader:
+            return flight.wait()
+
+        try:
+            config = loader(config_path)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[config_path]
+            flight.fail(e)
+            raise
+
+        with self._lock:
+            self._store(config_path, config, stat_key)
+            del self._inflight[config_path]
+        flight.finish(config)
+
+        return config
+
+    def put(self, config_path: Path, config: Any, stat_key: StatKey):
+        """Stores `config` for `config_path`, evicting the least recently used entry if full.
+
+        Args:
+            config_path (Path): Path to the config file
+            config (Any): The parsed config
+            stat_key (StatKey): Stat info of the file `config` was parsed from
+        """
+        config_path = normalize_path(config_path)
+        with self._lock:
+            self._store(config_path, config, stat_key)
+
+    def _store(self, config_path: Path, config: Any, stat_key: StatKey):
+        # Caller must hold `self._lock`
+        self._entries[config_path] = (stat_key, config)
+        self._entries.move_to_end(config_path)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, config_path: Optional[Path] = None):
+        """Drops the cached entry for `config_path`, or every entry if `config_path` is None
+
+        Args:
+            config_path (Optional[Path]): Path to drop. Defaults to None.
+        """
+        with self._lock:
+            if config_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(normalize_path(config_path), None)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.reparses = 0
+        self.waits = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit/miss/reparse counters along with the current and max size
+
+        `waits` counts lookups that shared another thread's in-flight load instead of parsing.
+
+        Returns:
+            Dict[str, int]: Cache stats
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reparses": self.reparses,
+            "waits": self.waits,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Set, Tuple, Union
+
+from src.common.config.config_node import ConfigNode
+
+ConfigPathKey = Tuple[str, ...]
+"""A path into a config tree as a tuple of keys. Eg, `("cluster-variables", "MC_TYPE")`"""
+
+ConfigLike = Union[ConfigNode, Dict]
+
+
+def _unwrap(config: ConfigLike) -> Dict:
+    if isinstance(config, ConfigNode):
+        return config.data
+    return config if config is not None else {}
+
+
+def format_path(path: ConfigPathKey) -> str:
+    """Formats a path tuple as a dotted string. Eg, `cluster-variables.MC_TYPE`"""
+    return ".".join(str(key) for key in path)
+
+
+@dataclass
+class ConfigDiff:
+    """The difference between two config trees.
+
+    Only leaf values are reported - if a whole subtree was added or removed it's reported once at
+    the subtree's path rather than once per leaf. Lists are compared as leaf values.
+    """
+
+    added: Dict[ConfigPathKey, Any] = field(default_factory=dict)
+    removed: Dict[ConfigPathKey, Any] = field(default_factory=dict)
+    changed: Dict[ConfigPathKey, Tuple[Any, Any]] = field(default_factory=dict)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def paths(self) -> Set[ConfigPathKey]:
+        """Returns every added, removed, or changed path"""
+        return self.added.keys() | self.removed.keys() | self.changed.keys()
+
+    def touches(self, prefix: Union[str, ConfigPathKey]) -> bool:
+        """Returns whether anything at or under `prefix` changed.
+
+        Eg, `diff.touches("cluster-variables")` to decide whether the `.env` files need regenerating.
+
+        Args:
+            prefix (Union[str, ConfigPathKey]): Dotted string or path tuple
+
+        Returns:
+            bool: Whether any changed path starts with `prefix`
+        """
+        if isinstance(prefix, str):
+            prefix = tuple(prefix.split("."))
+
+        prefix_len = len(prefix)
+        return any(
+            path[:prefix_len] == prefix or prefix[: len(path)] == path
+            for path in self.paths()
+        )
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Returns a json-friendly representation, with paths as dotted strings"""
+        return {
+            "added": {format_path(p): v for p, v in self.added.items()},
+            "removed": {format_path(p): v for p, v in self.removed.items()},
+            "changed": {
+                format_path(p): {"old": old, "new": new}
+                for p, (old, new) in self.changed.items()
+            },
+        }
+
+
+def _diff_dicts(old: Dict, new: Dict, prefix: ConfigPathKey, diff: ConfigDiff):
+    for key, old_val in old.items():
+        path = prefix + (key,)
+        if key not in new:
+            diff.removed[path] = old_val
+            continue
+
+        new_val = new[key]
+        if old_val is new_val:
+            continue
+
+        if isinstance(old_val, dict) and isinstance(new_val, dict):
+            # Comparing in C first short-circuits identical subtrees before we recurse in Python.
+            if old_val != new_val:
+                _diff_dicts(old_val, new_val, path, diff)
+        elif old_val != new_val or type(old_val) is not type(new_val):
+            diff.changed[path] = (old_val, new_val)
+
+    for key, new_val in new.items():
+        if key not in old:
+            diff.added[prefix + (key,)] = new_val
+
+
+def diff_configs(old: ConfigLike, new: ConfigLike) -> ConfigDiff:
+    """Returns the added, removed, and changed paths between two config trees.
+
+    Args:
+        old (ConfigLike): ConfigNode or dict to diff from
+        new (ConfigLike): ConfigNode or dict to diff to
+
+    Returns:
+        ConfigDiff: Differences going from `old` to `new`
+    """
+    diff = ConfigDiff()
+    old_data, new_data = _unwrap(old), _unwrap(new)
+    if old_data is not new_data and old_data != new_data:
+        _diff_dicts(old_data, new_data, (), diff)
+    return diff
+
+
+def _set_path(
+    root: Dict, path: ConfigPathKey, value: Any, delete: bool, copied: Set[int]
+):
+    """Sets (or deletes) `path` in `root`, copying each shared dict along the way so the inputs are untouched
+
+    `copied` tracks the ids of dicts we've already copied, so they're only copied once per patch.
+    """
+    node = root
+    for key in path[:-1]:
+        child = node.get(key)
+        if not isinstance(child, dict):
+            child = {}
+        elif id(child) not in copied:
+            child = dict(child)
+        copied.add(id(child))
+        node[key] = child
+        node = child
+
+    if delete:
+        node.pop(path[-1], None)
+    else:
+        node[path[-1]] = value
+
+
+def apply_diff(base: ConfigLike, diff: ConfigDiff) -> Dict:
+    """Applies `diff` to `base`, returning a new dict.
+
+    `base` isn't modified. Only the dicts along changed paths are copied, untouched subtrees are
+    shared with `base`.
+
+    Args:
+        base (ConfigLike): ConfigNode or dict to patch
+        diff (ConfigDiff): Diff to apply, usually from `diff_configs()`
+
+    Returns:
+        Dict: Patched config
+    """
+    patched = dict(_unwrap(base))
+    copied: Set[int] = set()
+
+    for path in diff.removed:
+        _set_path(patched, path, None, True, copied)
+    for path, value in diff.added.items():
+        _set_path(patched, path, value, False, copied)
+    for path, (_, value) in diff.changed.items():
+        _set_path(patched, path, value, False, copied)
+
+    return patched
+
+
+def merge_configs(base: ConfigLike, *overrides: ConfigLike) -> Dict:
+    """Deep merges `overrides` on top of `base`, later overrides winning.
+
+    Nested dicts are merged key by key, anything else (including lists) is replaced. Inputs aren't
+    modified, and subtrees that no override touches are shared with `base`.
+
+    Args:
+        base (ConfigLike): ConfigNode or dict to merge onto
+        *overrides (ConfigLike): ConfigNodes or dicts to merge on top
+
+    Returns:
+        Dict: Merged config
+    """
+    merged = dict(_unwrap(base))
+
+    for override in overrides:
+        for key, value in _unwrap(override).items():
+            if isinstance(value, dict) and isinstance(merged.get(key), dict):
+                merged[key] = merge_configs(merged[key], value)
+            else:
+                merged[key] = value
+
+    return merged
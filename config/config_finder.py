@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 
-from typing import Dict, Optional
+import os
+import threading
+
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from pathlib import Path
 
 
@@ -10,29 +13,106 @@ logger = getLogger(__name__)
 
 
 class ConfigFinder:
+    """Finds a config file by walking up from a starting directory.
+
+    Results, both found and not found, are remembered per (directory, config name) across every
+    ConfigFinder instance so repeated lookups don't stat the same candidates again. Use
+    `ConfigFinder.clear_cache()` if configs are created or removed while the process is running.
+    """
+
     data: Dict
     config_path: Path
 
     default_config_name: str = "config.yml"
 
+    _cache: Dict[Tuple[Path, str], Optional[Path]] = {}
+    _cache_lock = threading.Lock()
+
     def __init__(
-        self, config_name: Optional[str] = None, config_path: Optional[Path] = None
+        self,
+        config_name: Optional[Union[str, Iterable[str]]] = None,
+        config_path: Optional[Path] = None,
+        stop_path: Optional[Path] = None,
     ):
+        """
+        Args:
+            config_name (Optional[Union[str, Iterable[str]]]): Name, or names in order of preference, to look for. Defaults to `default_config_name`.
+            config_path (Optional[Path]): Directory to start searching from. Defaults to this file's directory.
+            stop_path (Optional[Path]): Last directory to search before giving up. Defaults to the filesystem root.
+
+        Raises:
+            FileNotFoundError: If none of the config names were found
+        """
         config_name = (
             config_name if config_name is not None else self.default_config_name
         )
         config_path = config_path if config_path is not None else Path(__file__).parent
 
-        self.config_path = self.rec_find_config(config_name, config_path)
+        self.config_path = self.find_config(config_name, config_path, stop_path)
 
-    def rec_find_config(self, config_name: str, curr_dir: Path):
-        logger.debug(f"{curr_dir} ?? {config_name}")
-        if str(curr_dir) == "/":
-            raise FileNotFoundError(f"Could not find a valid {config_name}.")
+    @classmethod
+    def find_config(
+        cls,
+        config_names: Union[str, Iterable[str]],
+        start_dir: Path,
+        stop_path: Optional[Path] = None,
+    ) -> Path:
+        """Walks up from `start_dir` looking for any of `config_names`.
+
+        In each directory the names are checked in order, so the closest directory wins and earlier
+        names win within a directory.
+
+        Args:
+            config_names (Union[str, Iterable[str]]): Name(s) to look for. Eg, ["config.yml", "config.toml", ".env"]
+            start_dir (Path): Directory to start searching from
+            stop_path (Optional[Path]): Last directory to search. Defaults to the filesystem root.
 
-        # Assumes config.yml is either in currdir or in a ancestor dir.
+        Raises:
+            FileNotFoundError: If none of the config names were found
+
+        Returns:
+            Path: Path of the found config
+        """
+        names: List[str] = (
+            [config_names] if isinstance(config_names, str) else list(config_names)
+        )
+        stop_dir = Path(os.path.abspath(stop_path)) if stop_path is not None else None
+        curr_dir = Path(os.path.abspath(start_dir))
+
+        while True:
+            for name in names:
+                found = cls._check_dir(curr_dir, name)
+                if found is not None:
+                    return found
+
+            if curr_dir == stop_dir or curr_dir.parent == curr_dir:
+                break
+            curr_dir = curr_dir.parent
+
+        raise FileNotFoundError(f"Could not find a valid {' or '.join(names)}.")
+
+    @classmethod
+    def _check_dir(cls, curr_dir: Path, config_name: str) -> Optional[Path]:
+        key = (curr_dir, config_name)
+        try:
+            return cls._cache[key]
+        except KeyError:
+            pass
+
+        logger.debug(f"{curr_dir} ?? {config_name}")
         config_path = curr_dir / config_name
-        if config_path.exists():
-            return config_path
-        else:
-            return self.rec_find_config(config_name, curr_dir.parent)
+        found = config_path if config_path.exists() else None
+
+        with cls._cache_lock:
+            cls._cache[key] = found
+        return found
+
+    @classmethod
+    def clear_cache(cls):
+        """Forgets every remembered lookup result"""
+        with cls._cache_lock:
+            cls._cache.clear()
+
+    def rec_find_config(self, config_name: str, curr_dir: Path):
+        """Kept for backwards compatibility. See `find_config()`."""
+        return self.find_config(config_name, curr_dir)
@@ -1,7 +1,39 @@
 #!/usr/bin/env python3
 
+import hashlib
+
+from functools import lru_cache
 from pprint import pformat
-from typing import TextIO, List, Tuple, Dict, Optional, Any
+from types import MappingProxyType
+from typing import TextIO, List, Tuple, Dict, Optional, Any, Union
+
+
+def hash_content(content: Union[str, bytes]) -> str:
+    """Returns the sha256 hexdigest of raw config content, used to tell config versions apart
+
+    Args:
+        content (Union[str, bytes]): Config file content
+
+    Returns:
+        str: Hex digest
+    """
+    if isinstance(content, str):
+        content = content.encode("utf8")
+    return hashlib.sha256(content).hexdigest()
+
+
+def _copy_dicts(data: Dict) -> Dict:
+    rtn_dict = {}
+
+    for key, value in data.items():
+        if isinstance(value, dict):
+            rtn_dict[key] = _copy_dicts(value)
+        elif isinstance(value, ConfigNode):
+            rtn_dict[key] = value.as_dict()
+        else:
+            rtn_dict[key] = value
+
+    return rtn_dict
 
 
 class ConfigNode:
@@ -25,9 +57,29 @@ class ConfigNode:
     - `root.baz` returns another ConfigNode representing `{"qux": ["quux", "thud"], "grunt": 0}`
     - `root.baz.qux` returns `["quux", "thud"]`
     - `root.baz.grunt` returns `0`
+
+    The parsed dict is kept as-is in `data`. Nested dicts are only wrapped in a ConfigNode the first
+    time they're accessed, and that wrapper is reused on subsequent accesses.
+
+    Missing nodes return the shared, immutable `EMPTY_CONFIG_NODE` rather than a new empty node.
+
+    Configs parsed from a file (TomlConfig, YamlConfig, EnvConfig) record the `hash_content()` of
+    what they were parsed from in `content_hash`, which can be used to key caches of derived data.
     """
 
+    __slots__ = (
+        "data",
+        "content_hash",
+        "_children",
+        "_alias_index",
+        "_alias_index_size",
+    )
+
     data: Dict
+    content_hash: Optional[str]
+    _children: Dict[str, "ConfigNode"]
+    _alias_index: Optional[Dict[str, str]]
+    _alias_index_size: int
 
     def __getattr__(self, name: str):
         """Allows accessing config node vals using attribute accessors (foo.bar)
@@ -40,29 +92,37 @@ class ConfigNode:
         Returns:
             Any | ConfigNode: Config node value
         """
-        hyphenated_name = name.replace("_", "-")
+        if name.startswith("__") or name in ConfigNode.__slots__:
+            # Unset slots and dunder lookups (copy, pickle) must not fall through to config keys.
+            raise AttributeError(name)
 
-        if name in self.data:
-            return self.data[name]
-        elif hyphenated_name in self.data:
-            return self.data[hyphenated_name]
-        else:
-            return ConfigNode({})
+        key = self._resolve_key(name)
+        if key is None:
+            return EMPTY_CONFIG_NODE
+
+        return self._get_child(key)
 
     def __getitem__(self, name):
         if name in self.data:
-            return self.data[name]
+            return self._get_child(name)
         else:
-            return ConfigNode({})
+            return EMPTY_CONFIG_NODE
 
     def __contains__(self, item):
         return item in self.data
 
+    def __getstate__(self):
+        return self.data
+
+    def __setstate__(self, state: Dict):
+        ConfigNode.__init__(self, state)
+
     def __str__(self):
         lines = [
             "",
         ]
-        for key, val in self.data.items():
+        for key in self.data:
+            val = self._get_child(key)
             if type(val) in [dict, list]:
                 val_str = pformat(val)
             else:
@@ -73,6 +133,67 @@ class ConfigNode:
     def __repr__(self):
         return self.__str__()
 
+    def _resolve_key(self, name: str) -> Optional[str]:
+        """Resolves an attribute name to the key it refers to in `self.data`.
+
+        Exact keys win, then the fully hyphenated version of `name`, then keys mixing underscores and
+        hyphens via the alias index. The index is built once per node and only rebuilt when the number
+        of keys changes or it points at a key that's gone, since `as_dict(copy=False)` callers can
+        change the keys under us. Names missing from an up to date index are misses without a rebuild.
+
+        Args:
+            name (str): Attribute name, eg `cluster_variables`
+
+        Returns:
+            Optional[str]: Matching key in `self.data`, or None if there isn't one.
+        """
+        if name in self.data:
+            return name
+        if "_" not in name or not self.data:
+            return None
+
+        hyphenated = name.replace("_", "-")
+        if hyphenated in self.data:
+            return hyphenated
+
+        if self._alias_index is not None and self._alias_index_size == len(self.data):
+            key = self._alias_index.get(name)
+            if key is None:
+                return None
+            if key in self.data:
+                return key
+
+        alias_index = {}
+        for key in self.data:
+            if type(key) is str and "-" in key:
+                alias_index.setdefault(key.replace("-", "_"), key)
+        self._alias_index = alias_index
+        self._alias_index_size = len(self.data)
+
+        return alias_index.get(name)
+
+    def _get_child(self, name: str):
+        """Returns the value at `name`, wrapping (and remembering) it in a ConfigNode if it's a dict.
+
+        Args:
+            name (str): Config node name. Must exist in `self.data`.
+
+        Returns:
+            Any | ConfigNode: Config node value
+        """
+        val = self.data[name]
+        if not isinstance(val, dict):
+            return val
+
+        child = self._children.get(name)
+        if child is None:
+            # setdefault so threads racing to wrap the same child all get the same node
+            child = self._children.setdefault(name, ConfigNode(val))
+        if child.data is not val:
+            child = ConfigNode(val)
+            self._children[name] = child
+        return child
+
     def listnodes(self) -> List[str]:
         return list(self.data.keys())
 
@@ -90,35 +211,173 @@ class ConfigNode:
             return default
         return self.__getitem__(name)
 
+    def get_path(self, path: str, default: Optional[Any] = None):
+        """Returns the value at the dotted `path`, eg `node.get_path("cluster_variables.MC_TYPE")`
+
+        Each segment is resolved like attribute access, so underscores also match hyphenated keys.
+        See `compile_path()` for precompiling a path to reuse across nodes.
+
+        Args:
+            path (str): Dot separated path of config node names
+            default (Any, optional): Value returned if `path` doesn't exist. Defaults to None.
+
+        Returns:
+            Any: Value at `path` or `default`
+        """
+        return compile_path(path).get(self, default)
+
     def items(
         self,
     ) -> List[Tuple[str,]]:
-        return list(self.data.items())  # type: ignore
+        return [(key, self._get_child(key)) for key in self.data]  # type: ignore
 
     def __init__(self, data: Dict):
-        self.data = {}
+        if isinstance(data, ConfigNode):
+            data = data.data
+        elif not isinstance(data, dict):
+            data = dict(data) if data is not None else {}
 
-        for k, v in data.items():
-            if type(v) in [int, float, str, bool, list]:
-                self.data[k] = v
-            elif v is not None:
-                self.data[k] = ConfigNode(dict(v))
-            else:
-                self.data[k] = None
+        self.data = data
+        self.content_hash = None
+        self._children = {}
+        self._alias_index = None
+        self._alias_index_size = 0
 
-    def as_dict(self):
-        rtn_dict = {}
+    def as_dict(self, copy: bool = True) -> Dict:
+        """Returns the config as a plain dict.
 
-        for key, value in self.data.items():
-            if issubclass(type(value), ConfigNode):
-                rtn_dict[key] = value.as_dict()
-            else:
-                rtn_dict[key] = value
+        The parsed dict is stored as-is, so there is no tree of ConfigNodes to unwind. By default the
+        nested dicts are copied so callers are free to mutate the structure, like the old rebuilt
+        dicts allowed. Read-only callers can pass `copy=False` to get the underlying dict itself.
+
+        Args:
+            copy (bool, optional): Whether to copy the nested dicts. Defaults to True.
+
+        Returns:
+            Dict: Config contents
+        """
+        if not copy:
+            return self.data
 
-        return rtn_dict
+        return _copy_dicts(self.data)
+
+    @classmethod
+    def from_data(cls, data: Dict, content_hash: Optional[str] = None) -> "ConfigNode":
+        """Builds a node of this class around already parsed `data`, skipping the subclass' parser.
+
+        Args:
+            data (Dict): Parsed config data
+            content_hash (Optional[str]): `hash_content()` of the content `data` was parsed from. Defaults to None.
+
+        Returns:
+            ConfigNode: Config node
+        """
+        node = cls.__new__(cls)
+        ConfigNode.__init__(node, data)
+        node.content_hash = content_hash
+        return node
+
+    @classmethod
+    def from_file(cls, f: TextIO) -> "ConfigNode":
+        """Parses a config from an open file. Subclasses are constructed from the file's content.
+
+        Args:
+            f (TextIO): File object to read from
+
+        Returns:
+            ConfigNode: Parsed config
+        """
+        return cls(f.read())  # type: ignore
 
     @staticmethod
     def write_cb(f: TextIO, config: Dict):
         raise NotImplementedError(
             "Called write_cb on a subclass that hasn't overwritten it!"
         )
+
+
+class _EmptyConfigNode(ConfigNode):
+    """Immutable empty node returned for every missing config node. See `EMPTY_CONFIG_NODE`."""
+
+    __slots__ = ()
+
+    def __init__(self):
+        object.__setattr__(self, "data", MappingProxyType({}))
+        object.__setattr__(self, "content_hash", None)
+        object.__setattr__(self, "_children", MappingProxyType({}))
+        object.__setattr__(self, "_alias_index", MappingProxyType({}))
+        object.__setattr__(self, "_alias_index_size", 0)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("EMPTY_CONFIG_NODE is immutable!")
+
+    def __reduce__(self):
+        return (_get_empty_config_node, ())
+
+    def as_dict(self, copy: bool = True) -> Dict:
+        return {}
+
+
+def _get_empty_config_node() -> ConfigNode:
+    return EMPTY_CONFIG_NODE
+
+
+EMPTY_CONFIG_NODE: ConfigNode = _EmptyConfigNode()
+"""Shared node returned when accessing a config node that doesn't exist."""
+
+
+class ConfigPath:
+    """A precompiled dotted path into a ConfigNode tree.
+
+    Eg,
+    MC_TYPE_PATH = compile_path("cluster_variables.MC_TYPE")
+    MC_TYPE_PATH.get(env.config)
+    """
+
+    __slots__ = ("path", "keys")
+
+    path: str
+    keys: Tuple[str, ...]
+
+    def __init__(self, path: str):
+        self.path = path
+        self.keys = tuple(path.split("."))
+
+    def __repr__(self):
+        return f"ConfigPath({self.path!r})"
+
+    def get(self, node: ConfigNode, default: Optional[Any] = None):
+        """Returns the value at this path within `node`, or `default` if it doesn't exist.
+
+        Args:
+            node (ConfigNode): Root node to resolve the path from
+            default (Any, optional): Value returned if the path doesn't exist. Defaults to None.
+
+        Returns:
+            Any: Value at this path or `default`
+        """
+        val: Any = node
+        for name in self.keys:
+            if not isinstance(val, ConfigNode):
+                return default
+
+            key = val._resolve_key(name)
+            if key is None:
+                return default
+
+            val = val._get_child(key)
+
+        return val
+
+
+@lru_cache(maxsize=1024)
+def compile_path(path: str) -> ConfigPath:
+    """Returns a (memoized) `ConfigPath` for the dotted `path`
+
+    Args:
+        path (str): Dot separated path of config node names
+
+    Returns:
+        ConfigPath: Compiled path
+    """
+    return ConfigPath(path)
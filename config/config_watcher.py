@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src.common.config import invalidate_config_caches
+from src.common.config.config_cache import StatKey, get_stat_key, normalize_path
+from src.common.helpers import log_exception
+from src.common.logger_setup import logger
+
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+INOTIFY_WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_DELETE_SELF
+)
+"""We watch directories rather than files so atomic rename-over writes (see `helpers.write_config`)
+are seen as a change to the path rather than the watched inode disappearing."""
+
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+
+STOP_SIGNAL = b"x"
+SWITCH_TO_POLLING_SIGNAL = b"p"
+"""Written to the watcher thread's wakeup pipe"""
+
+IGNORED_SUFFIXES = (".tmp", ".swp", "~")
+"""Editor swap files and our own `write_config` temp files don't count as config changes."""
+
+ChangeCallback = Callable[[Path], None]
+
+
+@dataclass(eq=False)
+class WatchSubscription:
+    """A single `ConfigWatcher.watch()` registration."""
+
+    path: Path
+    callback: ChangeCallback
+    is_dir: bool
+
+    def matches(self, changed_path: Path) -> bool:
+        if self.is_dir:
+            return changed_path.parent == self.path
+        return changed_path == self.path
+
+
+class _Inotify:
+    """Minimal ctypes wrapper around the Linux inotify API"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: Path, mask: int) -> int:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(path))
+        return wd
+
+    def rm_watch(self, wd: int):
+        self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self) -> List[Tuple[int, int, str]]:
+        """Reads all pending events
+
+        Returns:
+            List[Tuple[int, int, str]]: List of (wd, mask, name)
+        """
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _, name_len = INOTIFY_EVENT_HEADER.unpack_from(buf, offset)
+            offset += INOTIFY_EVENT_HEADER.size
+            name = os.fsdecode(buf[offset : offset + name_len].rstrip(b"\0"))
+            offset += name_len
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ConfigWatcher:
+    """Watches config files and directories, invalidating the loader caches and notifying subscribers on change.
+
+    Uses inotify on Linux and falls back to polling mtimes on other platforms, or if inotify
+    can't be initialized or runs out of watches (ENOSPC).
+
+    Eg,
+    watcher = ConfigWatcher()
+    watcher.watch(server_paths.get_env_toml_config_dir_path(), lambda path: reload_env(path))
+    watcher.start()
+    """
+
+    poll_interval: float
+    use_inotify: bool
+
+    _subscriptions: List[WatchSubscription]
+    _lock: threading.Lock
+    _thread: Optional[threading.Thread]
+    _stop_r: Optional[int]
+    _stop_w: Optional[int]
+
+    _inotify: Optional[_Inotify]
+    _wd_to_dir: Dict[int, Path]
+    _dir_to_wd: Dict[Path, int]
+
+    _poll_state: Dict[Path, Optional[StatKey]]
+
+    def __init__(self, poll_interval: float = 1.0, use_inotify: Optional[bool] = None):
+        """
+        Args:
+            poll_interval (float, optional): Seconds between polls when falling back to polling. Defaults to 1.0.
+            use_inotify (Optional[bool], optional): Force inotify on/off. Defaults to on for Linux.
+        """
+        self.poll_interval = poll_interval
+        self.use_inotify = (
+            use_inotify if use_inotify is not None else sys.platform == "linux"
+        )
+
+        self._subscriptions = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_r, self._stop_w = None, None
+
+        self._inotify = None
+        self._wd_to_dir = {}
+        self._dir_to_wd = {}
+
+        self._poll_state = {}
+
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                log_exception(
+                    message="Could not initialize inotify, falling back to polling"
+                )
+                self.use_inotify = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def watch(self, path: Path, callback: ChangeCallback) -> WatchSubscription:
+        """Subscribes `callback` to changes of `path`.
+
+        If `path` is a directory, `callback` is called for changes to any file directly inside it.
+
+        Args:
+            path (Path): File or directory to watch
+            callback (ChangeCallback): Called with the changed file's path, after the caches are invalidated
+
+        Raises:
+            OSError: If the inotify watch couldn't be added, other than for running out of watches
+
+        Returns:
+            WatchSubscription: Handle that can be passed to `unwatch()`
+        """
+        path = normalize_path(path)
+        subscription = WatchSubscription(path, callback, path.is_dir())
+        watch_dir = path if subscription.is_dir else path.parent
+
+        with self._lock:
+            if self._inotify is not None and watch_dir not in self._dir_to_wd:
+                try:
+                    wd = self._inotify.add_watch(watch_dir, INOTIFY_WATCH_MASK)
+                except OSError as e:
+                    if e.errno != errno.ENOSPC:
+                        raise
+                    logger.warning(
+                        f"Out of inotify watches watching '{watch_dir}', falling back to polling"
+                    )
+                    self._switch_to_polling()
+                else:
+                    self._wd_to_dir[wd] = watch_dir
+                    self._dir_to_wd[watch_dir] = wd
+
+            self._subscriptions.append(subscription)
+            if self._inotify is None:
+                self._poll_state.update(self._snapshot(subscription))
+
+        return subscription
+
+    def _switch_to_polling(self):
+        """Drops inotify for polling every subscription. Caller must hold `self._lock`."""
+        inotify = self._inotify
+        self._inotify = None
+        self.use_inotify = False
+        self._wd_to_dir.clear()
+        self._dir_to_wd.clear()
+        for subscription in self._subscriptions:
+            self._poll_state.update(self._snapshot(subscription))
+
+        if self._thread is not None:
+            # The inotify loop closes the fd and carries on polling
+            os.write(self._stop_w, SWITCH_TO_POLLING_SIGNAL)
+        elif inotify is not None:
+            inotify.close()
+
+    def unwatch(self, subscription: WatchSubscription):
+        """Removes a subscription previously returned by `watch()`
+
+        Args:
+            subscription (WatchSubscription): Subscription to remove
+        """
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+            watch_dir = (
+                subscription.path if subscription.is_dir else subscription.path.parent
+            )
+            still_watched = any(
+                (s.path if s.is_dir else s.path.parent) == watch_dir
+                for s in self._subscriptions
+            )
+            if self._inotify is not None and not still_watched:
+                wd = self._dir_to_wd.pop(watch_dir, None)
+                if wd is not None:
+                    self._wd_to_dir.pop(wd, None)
+                    self._inotify.rm_watch(wd)
+
+    def start(self):
+        """Starts the background watcher thread. No-op if already running."""
+        if self._thread is not None:
+            return
+
+        self._stop_r, self._stop_w = os.pipe()
+        self._thread = threading.Thread(
+            target=self._run_inotify if self._inotify is not None else self._run_poll,
+            name="ConfigWatcher",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stops the background watcher thread and waits for it to exit."""
+        if self._thread is None:
+            return
+
+        os.write(self._stop_w, STOP_SIGNAL)
+        self._thread.join()
+        self._thread = None
+
+        os.close(self._stop_r)
+        os.close(self._stop_w)
+        self._stop_r, self._stop_w = None, None
+
+    def close(self):
+        """Stops the watcher and releases the inotify fd"""
+        self.stop()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _dispatch(self, changed_paths: Set[Path]):
+        for changed_path in sorted(changed_paths):
+            if changed_path.name.endswith(IGNORED_SUFFIXES):
+                continue
+
+            logger.debug(f"Config watcher saw change to '{changed_path}'")
+            invalidate_config_caches(changed_path)
+
+            with self._lock:
+                subscriptions = [
+                    s for s in self._subscriptions if s.matches(changed_path)
+                ]
+
+            for subscription in subscriptions:
+                try:
+                    subscription.callback(changed_path)
+                except:
+                    log_exception(
+                        message="Config watcher callback raised!",
+                        data={"path": changed_path},
+                    )
+
+    def _run_inotify(self):
+        inotify = self._inotify
+        assert inotify is not None
+
+        while True:
+            readable, _, _ = select.select([inotify.fd, self._stop_r], [], [])
+            if self._stop_r in readable:
+                signal = os.read(self._stop_r, 1)
+                if signal == SWITCH_TO_POLLING_SIGNAL:
+                    inotify.close()
+                    return self._run_poll()
+                return
+
+            changed_paths = set()
+            for wd, mask, name in inotify.read_events():
+                if mask & IN_Q_OVERFLOW:
+                    # The kernel dropped events, so we can't know what changed
+                    logger.warning(
+                        "Config watcher's inotify queue overflowed, treating every watched path as changed"
+                    )
+                    invalidate_config_caches()
+                    changed_paths.update(self._watched_paths())
+                    continue
+                if mask & IN_IGNORED:
+                    continue
+
+                with self._lock:
+                    watch_dir = self._wd_to_dir.get(wd)
+                if watch_dir is None:
+                    continue
+
+                changed_paths.add(watch_dir / name if name else watch_dir)
+
+            self._dispatch(changed_paths)
+
+    def _snapshot(
+        self, subscription: WatchSubscription
+    ) -> Dict[Path, Optional[StatKey]]:
+        """Returns the current stat keys of every file covered by `subscription`. Missing files map to None."""
+        paths = [subscription.path]
+        if subscription.is_dir:
+            try:
+                paths = [Path(entry.path) for entry in os.scandir(subscription.path)]
+            except FileNotFoundError:
+                paths = []
+
+        snapshot: Dict[Path, Optional[StatKey]] = {}
+        for path in paths:
+            try:
+                snapshot[path] = get_stat_key(path)
+            except FileNotFoundError:
+                snapshot[path] = None
+        return snapshot
+
+    def _watched_paths(self) -> Set[Path]:
+        """Returns every file currently covered by a subscription"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        paths: Set[Path] = set()
+        for subscription in subscriptions:
+            paths.update(self._snapshot(subscription).keys())
+        return paths
+
+    def _run_poll(self):
+        while True:
+            readable, _, _ = select.select([self._stop_r], [], [], self.poll_interval)
+            if readable:
+                return
+
+            with self._lock:
+                subscriptions = list(self._subscriptions)
+
+            current: Dict[Path, Optional[StatKey]] = {}
+            for subscription in subscriptions:
+                current.update(self._snapshot(subscription))
+
+            with self._lock:
+                # Keep the baselines `watch()` took for subscriptions added since we listed them
+                added = [s for s in self._subscriptions if s not in subscriptions]
+                for path, stat_key in self._poll_state.items():
+                    if path not in current and any(
+                        s.matches(path) or s.path == path for s in added
+                    ):
+                        current[path] = stat_key
+
+                changed_paths = {
+                    path
+                    for path in current.keys() | self._poll_state.keys()
+                    if current.get(path) != self._poll_state.get(path)
+                }
+                self._poll_state = current
+
+            self._dispatch(changed_paths)
+
+
+__DEFAULT_WATCHER: Optional[ConfigWatcher] = None
+__DEFAULT_WATCHER_LOCK = threading.Lock()
+
+
+def watch_config_path(path: Path, callback: ChangeCallback) -> WatchSubscription:
+    """Subscribes `callback` to changes of `path` using a shared, lazily started `ConfigWatcher`
+
+    Args:
+        path (Path): File or directory to watch. Eg, `server_paths.get_env_toml_config_dir_path()`
+        callback (ChangeCallback): Called with the changed file's path
+
+    Returns:
+        WatchSubscription: Handle that can be passed to `unwatch_config_path()`
+    """
+    global __DEFAULT_WATCHER
+
+    watcher = __DEFAULT_WATCHER
+    if watcher is None:
+        with __DEFAULT_WATCHER_LOCK:
+            if __DEFAULT_WATCHER is None:
+                __DEFAULT_WATCHER = ConfigWatcher()
+                __DEFAULT_WATCHER.start()
+            watcher = __DEFAULT_WATCHER
+
+    return watcher.watch(path, callback)
+
+
+def unwatch_config_path(subscription: WatchSubscription):
+    """Removes a subscription previously returned by `watch_config_path()`
+
+    Args:
+        subscription (WatchSubscription): Subscription to remove
+    """
+    if __DEFAULT_WATCHER is not None:
+        __DEFAULT_WATCHER.unwatch(subscription)
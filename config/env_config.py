@@ -1,32 +1,188 @@
 #!/usr/bin/env python3
 
-from typing import TextIO, Dict, Optional
+import hashlib
+import re
+
+from typing import TextIO, Dict, Iterable, Iterator, Optional, Union
 from pathlib import Path
 from pprint import pprint, pformat
 
 from src.common.helpers import log_exception
-from src.common.config.config_node import ConfigNode
+from src.common.config.config_node import ConfigNode, hash_content
 from src.common.logger_setup import logger
 
+INLINE_COMMENT_REGEX = re.compile(r"\s+#")
+"""Matches the start of an inline comment on an unquoted value, ie whitespace followed by a '#'"""
+
+UNQUOTED_UNSAFE_REGEX = re.compile(
+    r"^\s|\s$|^[\"']|[#\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]"
+)
+"""Matches values that can't be written unquoted and still be read back as-is, including any of the
+characters `str.splitlines()` treats as line boundaries"""
+
+DOUBLE_QUOTE_UNESCAPES = {
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+    "\\": "\\",
+    '"': '"',
+}
+
+DOUBLE_QUOTE_ESCAPES = str.maketrans(
+    {
+        "\\": "\\\\",
+        '"': '\\"',
+        "\n": "\\n",
+        "\r": "\\r",
+    }
+)
+
+
+def _read_quoted(first: str, lines: Iterator[str], quote_char: str) -> str:
+    """Reads a quoted value starting at `first` (just past the opening quote).
+
+    Quoted values may span multiple lines, in which case we keep pulling from `lines` until we
+    find the closing quote. Double quoted values support backslash escapes, single quoted values
+    are taken literally. Anything after the closing quote is ignored.
+
+    Args:
+        first (str): Rest of the line after the opening quote
+        lines (Iterator[str]): Remaining lines of the env file
+        quote_char (str): Either `"` or `'`
+
+    Raises:
+        ValueError: If we hit the end of the file without finding a closing quote
+
+    Returns:
+        str: Unquoted (and unescaped) value
+    """
+    chunks = []
+    buf = first
+
+    while True:
+        end = buf.find(quote_char)
+        if end != -1 and (quote_char == "'" or "\\" not in buf):
+            # Fast path, nothing to unescape before the closing quote
+            chunks.append(buf[:end])
+            return "".join(chunks)
+
+        i = 0
+        while i < len(buf):
+            c = buf[i]
+            if c == quote_char:
+                return "".join(chunks)
+            if c == "\\" and quote_char == '"' and i + 1 < len(buf):
+                nxt = buf[i + 1]
+                if nxt in DOUBLE_QUOTE_UNESCAPES:
+                    chunks.append(DOUBLE_QUOTE_UNESCAPES[nxt])
+                    i += 2
+                    continue
+            chunks.append(c)
+            i += 1
+
+        buf = next(lines, None)
+        if buf is None:
+            raise ValueError(f"Unterminated {quote_char} quoted value in env config!")
+
+
+def split_env_lines(content: str) -> Iterator[str]:
+    """Splits env config content into lines on `\\n` only, keeping the line endings.
+
+    Unlike `str.splitlines()` this doesn't break on `\\x0b`, `\\x0c`, `\\x85`, `\\u2028` etc, so
+    values containing them are read the same as when streaming the file from disk.
+
+    Args:
+        content (str): Env config content
+
+    Yields:
+        Iterator[str]: Lines of `content`
+    """
+    start = 0
+    while start < len(content):
+        end = content.find("\n", start)
+        if end == -1:
+            yield content[start:]
+            return
+        yield content[start : end + 1]
+        start = end + 1
+
+
+def parse_env_lines(lines: Iterable[str]) -> Dict[str, str]:
+    """Parses docker-compose style `.env` lines in a single pass.
+
+    Supports:
+    - Blank lines and full line `#` comments, which are skipped
+    - An optional `export ` prefix
+    - Unquoted values, with inline comments if the `#` is preceded by whitespace
+    - Single quoted values, taken literally
+    - Double quoted values, with `\\n`, `\\r`, `\\t`, `\\\\` and `\\"` escapes
+    - Quoted values spanning multiple lines
+
+    Args:
+        lines (Iterable[str]): Lines to parse. Can be a file object to stream straight from disk.
+
+    Returns:
+        Dict[str, str]: Parsed key/vals
+    """
+    data = {}
+    line_iter = iter(lines)
+
+    for line in line_iter:
+        line = line.lstrip()
+        if not line or line[0] == "#":
+            continue
+
+        if line.startswith("export "):
+            line = line[len("export ") :].lstrip()
+
+        key, _, val = line.partition("=")
+        key = key.strip()
+        if not key:
+            continue
+
+        val = val.lstrip()
+        if val[:1] in ('"', "'"):
+            data[key] = _read_quoted(val[1:], line_iter, val[0])
+        else:
+            data[key] = INLINE_COMMENT_REGEX.split(val, 1)[0].rstrip()
+
+    return data
+
+
+def format_env_line(key: str, value: str, quote: Optional[bool] = True) -> str:
+    """Formats a single `KEY=value` line that `parse_env_lines()` will read back as-is.
+
+    Args:
+        key (str): Env var name
+        value (str): Env var value
+        quote (Optional[bool]): Whether to double quote the value. Values that can't be represented
+                                unquoted are always quoted. Defaults to True
+
+    Returns:
+        str: Formatted line including the trailing newline
+    """
+    value = f"{value}"
+    if quote or UNQUOTED_UNSAFE_REGEX.search(value):
+        return f'{key}="{value.translate(DOUBLE_QUOTE_ESCAPES)}"\n'
+    return f"{key}={value}\n"
+
 
 class EnvConfig(ConfigNode):
+    __slots__ = ()
+
+    PARSER_VERSION = "env-1"
+
     data: Dict
 
-    def __init__(self, config_content: str):
+    def __init__(self, config_content: Union[str, Iterable[str]]):
         self.data = {}
+        content_hash = None
 
         try:
-            for line in config_content.split("\n"):
-                line = line.strip()
-                if not line:
-                    continue
-                split = line.split("=")
-                key = split[0]
-                val = "=".join(
-                    split[1:]
-                )  # Just incase there were any ='s in the vals...? Is that even valid syntax?
-
-                self.data[key] = val
+            if type(config_content) is str:
+                content_hash = hash_content(config_content)
+                config_content = split_env_lines(config_content)
+            self.data = parse_env_lines(config_content)
         except:
             log_exception()
 
@@ -34,6 +190,36 @@ class EnvConfig(ConfigNode):
             self.data = {}
 
         super().__init__(self.data)
+        self.content_hash = content_hash
+
+    @classmethod
+    def from_file(cls, f: TextIO) -> "EnvConfig":
+        """Parses the env config by streaming lines from `f` rather than reading it all up front.
+
+        The content hash is computed as the lines stream past, so it matches `hash_content()` of
+        the whole file.
+
+        Args:
+            f (TextIO): File object to read from
+
+        Returns:
+            EnvConfig: Parsed config
+        """
+        digest = hashlib.sha256()
+
+        def hashed_lines() -> Iterator[str]:
+            for line in f:
+                digest.update(line.encode("utf8"))
+                yield line
+
+        lines = hashed_lines()
+        config = cls(lines)
+        # Drain whatever the parser didn't get to (ie if it failed) so the hash covers the whole file
+        for _ in lines:
+            pass
+
+        config.content_hash = digest.hexdigest()
+        return config
 
     def print_config(self):
         pprint(self.data)
@@ -42,14 +228,15 @@ class EnvConfig(ConfigNode):
     def write_cb(f: TextIO, config: Dict, quote: Optional[bool] = True):
         """Env config write callback.
 
+        Builds the whole payload up front and writes it with a single `f.write()`.
+
         Args:
             f (TextIO): File object to write to
             config (dict): Config to dump
             quote (Optional[bool]) Whether to quote the config vals. Defaults to True
         """
         logger.debug(pformat(config))
-        for key, value in config.items():
-            if quote:
-                f.write(f'{key}="{value}"\n'.encode("utf8"))
-            else:
-                f.write(f"{key}={value}\n".encode("utf8"))
+        payload = "".join(
+            format_env_line(key, value, quote) for key, value in config.items()
+        )
+        f.write(payload.encode("utf8"))
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+import hashlib
+import marshal
+import os
+import pickle
+import tempfile
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.common.helpers import log_exception
+from src.common.logger_setup import logger
+
+MARSHAL_FORMAT = b"m"
+PICKLE_FORMAT = b"p"
+
+CACHE_FORMAT_VERSION = "1"
+"""Bump to invalidate every existing cache entry if the on-disk format changes."""
+
+
+def get_default_cache_dir() -> Path:
+    """Returns `$XDG_CACHE_HOME/yc-common/configs`, defaulting to `~/.cache/yc-common/configs`
+
+    Returns:
+        Path: Cache dir
+    """
+    base = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "yc-common" / "configs"
+
+
+class PersistentConfigCache:
+    """On-disk cache of parsed config data, keyed by the hash of the file content and parser version.
+
+    Entries are stored with `marshal` where possible (plain dicts, lists, strs, numbers) and with
+    `pickle` otherwise (eg, toml datetimes). The total size of the cache dir is bounded, evicting the
+    least recently used entries first. Recency is tracked through the entry's mtime, which is bumped on
+    every hit.
+
+    Only point this at a directory you own - entries are unpickled on load.
+    """
+
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    cache_dir: Path
+    max_bytes: int
+    hits: int
+    misses: int
+
+    def __init__(
+        self, cache_dir: Optional[Path] = None, max_bytes: Optional[int] = None
+    ):
+        self.cache_dir = (
+            Path(cache_dir) if cache_dir is not None else get_default_cache_dir()
+        )
+        self.max_bytes = max_bytes if max_bytes is not None else self.DEFAULT_MAX_BYTES
+        self.hits = 0
+        self.misses = 0
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get_key(self, content: bytes, parser_version: str) -> str:
+        """Returns the cache key for `content` parsed by `parser_version`
+
+        Args:
+            content (bytes): Raw config file content
+            parser_version (str): Identifies the parser (and its version) that produced the data
+
+        Returns:
+            str: Hex digest key
+        """
+        hasher = hashlib.sha256()
+        hasher.update(f"{CACHE_FORMAT_VERSION}:{parser_version}:".encode("utf8"))
+        hasher.update(content)
+        return hasher.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.cache"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached parsed data for `key`, or None on a miss
+
+        Args:
+            key (str): Key from `get_key()`
+
+        Returns:
+            Optional[Any]: Parsed data
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "rb") as f:
+                fmt = f.read(1)
+                payload = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        try:
+            if fmt == MARSHAL_FORMAT:
+                data = marshal.loads(payload)
+            elif fmt == PICKLE_FORMAT:
+                data = pickle.loads(payload)
+            else:
+                raise ValueError(f"Unknown cache entry format: {fmt!r}")
+        except:
+            log_exception(
+                message="Dropping unreadable config cache entry",
+                data={"entry_path": entry_path},
+            )
+            entry_path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(entry_path)
+        except FileNotFoundError:
+            pass
+
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: Any):
+        """Stores `data` under `key`, then evicts old entries if we're over `max_bytes`
+
+        Args:
+            key (str): Key from `get_key()`
+            data (Any): Parsed data to store
+        """
+        try:
+            serialized = MARSHAL_FORMAT + marshal.dumps(data)
+        except ValueError:
+            try:
+                payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, AttributeError, TypeError):
+                # Eg, toml's inline tables are instances of a class local to the decoder
+                logger.debug("Not caching config data that can't be pickled")
+                return
+            try:
+                # Some parser types pickle but can't be unpickled (eg, toml's TomlTz)
+                pickle.loads(payload)
+            except Exception:
+                logger.debug(
+                    "Not caching config data that can't round trip through pickle"
+                )
+                return
+            serialized = PICKLE_FORMAT + payload
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(serialized)
+            os.replace(tmp_path, self._entry_path(key))
+        except:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache dir is within `max_bytes`"""
+        entries = []
+        total_bytes = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".cache"):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, entry.path))
+            total_bytes += st.st_size
+
+        if total_bytes <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            Path(path).unlink(missing_ok=True)
+            total_bytes -= size
+            logger.debug(f"Evicted config cache entry '{path}'")
+
+    def clear(self):
+        """Removes every entry in the cache dir"""
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".cache"):
+                Path(entry.path).unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit/miss counters
+
+        Returns:
+            Dict[str, int]: Cache stats
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "max_bytes": self.max_bytes,
+        }
@@ -8,14 +8,19 @@ import toml  # type: ignore
 import tomli_w
 
 from src.common.helpers import log_exception
-from src.common.config.config_node import ConfigNode
+from src.common.config.config_node import ConfigNode, hash_content
 from src.common.config.config_finder import ConfigFinder
 
 
 class TomlConfig(ConfigNode):
+    __slots__ = ()
+
+    PARSER_VERSION = f"toml-{toml.__version__}"
+
     data: Dict
 
     def __init__(self, config_content: str):
+        self.data = None
         try:
             self.data = toml.loads(config_content)
         except:
@@ -25,6 +30,7 @@ class TomlConfig(ConfigNode):
             self.data = {}
 
         super().__init__(self.data)
+        self.content_hash = hash_content(config_content)
 
     def print_config(self):
         pprint(self.data)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+from typing import Any
+
+import yaml  # type: ignore
+
+# Prefer the libyaml (C) implementations, falling back to pure Python if PyYAML was built without it.
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper  # type: ignore
+
+    HAS_LIBYAML = True
+except ImportError:
+    from yaml import SafeLoader, SafeDumper  # type: ignore
+
+    HAS_LIBYAML = False
+
+
+def represent_none(dumper: yaml.SafeDumper, value: None) -> yaml.ScalarNode:
+    """Dumps `None` as an empty value (`foo:`) rather than `foo: null`"""
+    return dumper.represent_scalar("tag:yaml.org,2002:null", "")
+
+
+# The pure Python SafeDumper is still registered for anyone calling `yaml.safe_dump()` directly.
+yaml.SafeDumper.add_representer(type(None), represent_none)
+SafeDumper.add_representer(type(None), represent_none)
+
+
+def load_yaml(content: str) -> Any:
+    """Safe loads `content` using the libyaml backed loader when available
+
+    Args:
+        content (str): Yaml content
+
+    Returns:
+        Any: Parsed yaml
+    """
+    return yaml.load(content, Loader=SafeLoader)
+
+
+def dump_yaml(data: Any, **kwargs: Any) -> str:
+    """Safe dumps `data` using the libyaml backed dumper when available
+
+    Args:
+        data (Any): Data to dump
+        **kwargs: Passed through to `yaml.dump()`
+
+    Returns:
+        str: Yaml content
+    """
+    return yaml.dump(data, Dumper=SafeDumper, **kwargs)
@@ -6,24 +6,24 @@ from pprint import pprint
 
 import yaml  # type: ignore
 
-yaml.SafeDumper.add_representer(
-    type(None),
-    lambda dumper, value: dumper.represent_scalar("tag:yaml.org,2002:null", ""),
-)
-
 from src.common.helpers import log_exception
-from src.common.config.config_node import ConfigNode
+from src.common.config.config_node import ConfigNode, hash_content
 from src.common.config.config_finder import ConfigFinder
+from src.common.config.yaml_backend import HAS_LIBYAML, dump_yaml, load_yaml
 from src.common.logger_setup import logger
 
 
 class YamlConfig(ConfigNode):
+    __slots__ = ()
+
+    PARSER_VERSION = f"yaml-{yaml.__version__}-{'libyaml' if HAS_LIBYAML else 'python'}"
+
     data: Dict
 
     def __init__(self, config_content: str):
-
+        self.data = None
         try:
-            self.data = yaml.safe_load(config_content)
+            self.data = load_yaml(config_content)
         except:
             log_exception()
 
@@ -31,6 +31,7 @@ class YamlConfig(ConfigNode):
             self.data = {}
 
         super().__init__(self.data)
+        self.content_hash = hash_content(config_content)
 
     def print_config(self):
         pprint(self.data)
@@ -39,14 +40,14 @@ class YamlConfig(ConfigNode):
     def write_cb(f: TextIO, config: Dict):
         """Yaml config write callback.
 
-        Writes with `f.write(yaml.safe_dump())`
+        Writes with `f.write(dump_yaml())`
 
         Args:
             f (TextIO): File object to write to
             config (dict): Config to dump
         """
         f.write(
-            yaml.safe_dump(
+            dump_yaml(
                 config,
                 default_flow_style=False,
                 sort_keys=False,
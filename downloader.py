@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from src.common import http_client
+from src.common.helpers import log_exception
+from src.common.logger_setup import logger
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_PER_HOST = 4
+
+
+class DownloadCancelled(RuntimeError):
+    """Raised inside a download when its pipeline was cancelled"""
+
+
+@dataclass
+class DownloadTask:
+    """A single file to download"""
+
+    url: str
+    dest: Path
+    size: Optional[int] = None
+    """Expected size in bytes, if known. Only used for progress reporting."""
+    label: str = ""
+    hashes: Dict[str, str] = field(default_factory=dict)
+    """Expected hex digests by hashlib algorithm name, verified before the file is moved into place"""
+
+    def __post_init__(self):
+        self.dest = Path(self.dest)
+        if not self.label:
+            self.label = self.dest.name
+
+
+@dataclass
+class DownloadProgress:
+    """Snapshot of a pipeline's progress, passed to its progress callback"""
+
+    total_files: int = 0
+    completed_files: int = 0
+    failed_files: int = 0
+    total_bytes: int = 0
+    """Sum of the known task sizes"""
+    downloaded_bytes: int = 0
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of `DownloadPipeline.run()`"""
+
+    completed: List[DownloadTask] = field(default_factory=list)
+    failed: List[Tuple[DownloadTask, BaseException]] = field(default_factory=list)
+    cancelled: List[DownloadTask] = field(default_factory=list)
+    downloaded_bytes: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed and not self.cancelled
+
+    def raise_for_errors(self):
+        """Raises a RuntimeError summarizing any failed or cancelled downloads
+
+        Raises:
+            RuntimeError: If anything didn't complete
+        """
+        if self.ok:
+            return
+        failures = ", ".join(f"'{task.label}' ({e})" for task, e in self.failed)
+        raise RuntimeError(
+            f"{len(self.failed)} download(s) failed and {len(self.cancelled)} were cancelled! {failures}"
+        )
+
+
+class DownloadPipeline:
+    """Downloads many files concurrently through the shared HTTP session.
+
+    At most `max_workers` downloads run at once, and at most `max_per_host` of those against the same
+    host. Progress is aggregated across every download and reported to `progress_cb` after each chunk
+    and each finished file. Failed downloads don't stop the others, they're collected in the result.
+
+    `cancel()` (from any thread, eg a progress callback) stops queued downloads from starting and
+    aborts in-flight ones at their next chunk. Destinations only ever hold complete, verified files;
+    interrupted downloads are kept as `.part` files and resumed by the next run.
+    """
+
+    max_workers: int
+    max_per_host: int
+    progress_cb: Optional[Callable[[DownloadProgress], None]]
+    max_bytes_per_sec: Optional[float]
+
+    _cancelled: threading.Event
+    _host_limits: Dict[str, threading.BoundedSemaphore]
+    _lock: threading.Lock
+    _progress: DownloadProgress
+    _rate_limiter: Optional[http_client.RateLimiter]
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        progress_cb: Optional[Callable[[DownloadProgress], None]] = None,
+        max_bytes_per_sec: Optional[float] = None,
+    ):
+        """
+        Args:
+            max_workers (int, optional): Max concurrent downloads. Defaults to DEFAULT_MAX_WORKERS.
+            max_per_host (int, optional): Max concurrent downloads per host. Defaults to DEFAULT_MAX_PER_HOST.
+            progress_cb (Optional[Callable[[DownloadProgress], None]]): Called with a progress snapshot as downloads advance. Defaults to None.
+            max_bytes_per_sec (Optional[float]): Bandwidth cap shared by every download. Defaults to None (uncapped).
+        """
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.progress_cb = progress_cb
+        self.max_bytes_per_sec = max_bytes_per_sec
+        self._rate_limiter = (
+            http_client.RateLimiter(max_bytes_per_sec) if max_bytes_per_sec else None
+        )
+        self._cancelled = threading.Event()
+        self._host_limits = {}
+        self._lock = threading.Lock()
+        self._progress = DownloadProgress()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Stops queued downloads from starting and aborts in-flight ones"""
+        self._cancelled.set()
+
+    def progress(self) -> DownloadProgress:
+        """Returns a snapshot of the current progress"""
+        with self._lock:
+            return DownloadProgress(**vars(self._progress))
+
+    def _host_limit(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = threading.BoundedSemaphore(self.max_per_host)
+                self._host_limits[host] = limit
+            return limit
+
+    def _report(self, downloaded: int = 0, completed: int = 0, failed: int = 0):
+        with self._lock:
+            self._progress.downloaded_bytes += downloaded
+            self._progress.completed_files += completed
+            self._progress.failed_files += failed
+            snapshot = DownloadProgress(**vars(self._progress))
+
+        if self.progress_cb is not None:
+            try:
+                self.progress_cb(snapshot)
+            except:
+                log_exception(message="Download progress callback failed")
+
+    def _on_chunk(self, chunk_len: int):
+        if self._cancelled.is_set():
+            raise DownloadCancelled("Download pipeline was cancelled")
+        self._report(downloaded=chunk_len)
+
+    def _download(self, task: DownloadTask):
+        if self._cancelled.is_set():
+            raise DownloadCancelled("Download pipeline was cancelled")
+
+        with self._host_limit(task.url):
+            if self._cancelled.is_set():
+                raise DownloadCancelled("Download pipeline was cancelled")
+
+            logger.debug(f"Downloading '{task.url}' to '{task.dest}'")
+            task.dest.parent.mkdir(parents=True, exist_ok=True)
+            http_client.download_file(
+                task.url,
+                task.dest,
+                on_chunk=self._on_chunk,
+                hashes=task.hashes,
+                rate_limiter=self._rate_limiter,
+            )
+
+    def run(self, tasks: Iterable[DownloadTask]) -> DownloadResult:
+        """Downloads every task, returning once they've all finished, failed, or been cancelled
+
+        Args:
+            tasks (Iterable[DownloadTask]): Files to download
+
+        Returns:
+            DownloadResult: What completed, failed, and was cancelled
+        """
+        tasks = list(tasks)
+        with self._lock:
+            self._progress.total_files += len(tasks)
+            self._progress.total_bytes += sum(task.size or 0 for task in tasks)
+
+        result = DownloadResult()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [(task, executor.submit(self._download, task)) for task in tasks]
+            for task, future in futures:
+                error = future.exception()
+                if error is None:
+                    result.completed.append(task)
+                    self._report(completed=1)
+                elif isinstance(error, DownloadCancelled):
+                    result.cancelled.append(task)
+                else:
+                    logger.error(f"Failed to download '{task.label}': {error}")
+                    result.failed.append((task, error))
+                    self._report(failed=1)
+
+        result.elapsed = time.perf_counter() - start
+        result.downloaded_bytes = sum(
+            task.dest.stat().st_size for task in result.completed
+        )
+        return result
@@ -1,15 +1,21 @@
 import re
+import threading
 
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 from pprint import pformat
-from functools import total_ordering
+from functools import total_ordering, wraps
 
 from pydantic import Field, BaseModel  # type: ignore
 
 from src.common.config import load_toml_config
+from src.common.config.config_cache import StatKey, get_stat_key
 from src.common.config.config_node import ConfigNode
-from src.common.helpers import log_exception
+from src.common.helpers import dump_json, log_exception
 from src.common.logger_setup import logger
+from src.common.mc_version import McVersion
 from src.common.types import ServerTypes
 from src.common import server_paths
 
@@ -35,8 +41,38 @@ class EnvModel(BaseModel):
     port: int = Field(description="Port number that the MC proxy (Velocity) will use")
 
 
+def env_cached_property(fn: Callable[["Env"], Any]) -> property:
+    """Like `property`, but the value is computed once and cached on the Env until `Env.reload()`"""
+    key = fn.__name__
+
+    @wraps(fn)
+    def getter(self: "Env"):
+        cache = self._cache
+        if key in cache:
+            return cache[key]
+        val = cache[key] = fn(self)
+        return val
+
+    return property(getter)
+
+
 @total_ordering
 class Env:
+    """Represents a single environment, backed by its `gen/env-toml/{env}.toml`.
+
+    The toml isn't loaded until something first needs it, so callers that only use `name`, `num`, or
+    `is_prod()` never touch disk. Values derived from the config are cached until `reload()`.
+    """
+
+    __slots__ = (
+        "env_str",
+        "num",
+        "_config_path",
+        "_config_node",
+        "_cluster_vars",
+        "_cache",
+    )
+
     WORLDGROUP_NAME_BLOCKLIST = [
         "defaultplugins",
         "defaultmods",
@@ -44,7 +80,7 @@ class Env:
     ]
 
     fields_to_print = {
-        "config": lambda self: self.config.as_dict(),
+        "config": lambda self: self.config.as_dict(copy=False),
         "name": lambda self: self.name,
         "hostname": lambda self: self.hostname,
         "description": lambda self: self.description,
@@ -54,20 +90,40 @@ class Env:
         "port": lambda self: self.proxy_port,
     }
 
-    _config_node: ConfigNode
+    _config_path: Optional[Path]
+    _config_node: Optional[ConfigNode]
+    _cluster_vars: Optional[ConfigNode]
+    _cache: Dict[str, Any]
 
     @property
     def config(self) -> ConfigNode:
         """Returns a `ConfigNode` object representing the env config toml
 
+        Loads the toml on first access.
+
         Returns:
             ConfigNode: Env config
         """
-        return self._config_node
+        if self._config_node is None:
+            self.load()
+        return self._config_node  # type: ignore
 
     @config.setter
     def config(self, node: ConfigNode):
         self._config_node = node
+        self._cluster_vars = None
+        self._cache = {}
+
+    @property
+    def cluster_vars(self) -> ConfigNode:
+        """Returns the `cluster-variables` section of the env config toml
+
+        Returns:
+            ConfigNode: Cluster variables
+        """
+        if self._cluster_vars is None:
+            self._cluster_vars = self.config.cluster_variables
+        return self._cluster_vars
 
     @property
     def name(self) -> str:
@@ -78,7 +134,7 @@ class Env:
         """
         return self.env_str
 
-    @property
+    @env_cached_property
     def hostname(self) -> str:
         """The hostname of the docker container
 
@@ -87,7 +143,7 @@ class Env:
         """
         return self.config.general.get("hostname", "")
 
-    @property
+    @env_cached_property
     def description(self) -> str:
         """Description in the env config toml
 
@@ -96,7 +152,7 @@ class Env:
         """
         return self.config.general.get("description", "")
 
-    @property
+    @env_cached_property
     def alias(self) -> str:
         """A human-readable alias for the env (unlike 'env1', 'env2', etc)
 
@@ -105,7 +161,7 @@ class Env:
         """
         return self.cluster_vars.get("ENV_ALIAS", "")
 
-    @property
+    @env_cached_property
     def proxy_port(self) -> int:
         """Port that the Velocity proxy is running on.
 
@@ -116,7 +172,7 @@ class Env:
         """
         return self.cluster_vars.get("VELOCITY_PORT", "")
 
-    @property
+    @env_cached_property
     def server_type(self) -> str:
         """Returns the Minecraft server type
 
@@ -125,7 +181,7 @@ class Env:
         """
         return self.cluster_vars.get("MC_TYPE", "")
 
-    @property
+    @env_cached_property
     def server_version(self) -> str:
         """Returns the Minecraft server version
 
@@ -134,7 +190,16 @@ class Env:
         """
         return self.cluster_vars.get("MC_VERSION", "")
 
-    @property
+    @env_cached_property
+    def mc_version(self) -> Optional[McVersion]:
+        """Returns the parsed Minecraft server version, for comparisons
+
+        Returns:
+            Optional[McVersion]: Parsed `server_version`, or None if it's missing or not a release version
+        """
+        return McVersion.try_parse(self.server_version)
+
+    @env_cached_property
     def formatted(self) -> str:
         """A formatted name/string for the environment.
 
@@ -150,16 +215,25 @@ class Env:
     def world_groups(self) -> List[str]:
         """A list of enabled world groups
 
+        Returns:
+            List[str]: A list of strings each representing a logical "world group".
+        """
+        return list(self._world_groups)
+
+    @env_cached_property
+    def _world_groups(self) -> Tuple[str, ...]:
+        """A list of enabled world groups
+
         Returns:
             List[str]: A list of strings each representing a logical "world group".
         """
         all_world_groups = self.config.world_groups.get("enabled_groups", [])
-        filtered_world_groups = list(
+        filtered_world_groups = tuple(
             filter(lambda w: w not in self.WORLDGROUP_NAME_BLOCKLIST, all_world_groups)
         )
         return filtered_world_groups
 
-    @property
+    @env_cached_property
     def enable_env_protection(self) -> bool:
         """Returns whether env protection is enabled for this env.
 
@@ -172,13 +246,25 @@ class Env:
 
     num: Optional[int]
 
-    def __init__(self, env_str: str):
+    def __init__(self, env_str: str, config_path: Optional[Path] = None):
+        """
+        Args:
+            env_str (str): Env name. Eg, `env1`
+            config_path (Optional[Path]): Env toml to load. Defaults to `server_paths.get_env_toml_config_path(env_str)`
+
+        Raises:
+            InvalidEnvException: If `env_str` isn't a valid env name
+        """
         if not self.is_valid_env(env_str):
             raise InvalidEnvException()
 
         logger.info(f"Instantiating Env object for env: '{env_str}'")
 
         self.env_str = env_str
+        self._config_path = config_path
+        self._config_node = None
+        self._cluster_vars = None
+        self._cache = {}
 
         num = re.sub(r"\D", "", env_str)
         try:
@@ -186,10 +272,22 @@ class Env:
         except:
             self.num = None
 
+    def load(self) -> "Env":
+        """Loads (or reloads) the env toml config, dropping any cached derived values.
+
+        The toml is loaded through `load_toml_config()`, so an unchanged file isn't reparsed.
+
+        Returns:
+            Env: self
+        """
+        config_path = (
+            self._config_path
+            if self._config_path is not None
+            else server_paths.get_env_toml_config_path(self.env_str)
+        )
+
         try:
-            self.config = load_toml_config(
-                server_paths.get_env_toml_config_path(self.env_str), no_cache=True
-            )
+            config = load_toml_config(config_path)
         except:
             log_exception(
                 message="Failed to load environment toml config!",
@@ -197,10 +295,21 @@ class Env:
                     "env_str": self.env_str,
                 },
             )
-            self.config = ConfigNode({})
+            config = ConfigNode({})
+
+        if config is not self._config_node:
+            self.config = config
+            logger.info(f"Loaded env config for env: '{self.env_str}'")
+
+        return self
 
-        self.cluster_vars = self.config.cluster_variables
-        logger.info("Env instantiated")
+    def reload(self) -> "Env":
+        """Alias of `load()` for callers that know the toml may have changed.
+
+        Returns:
+            Env: self
+        """
+        return self.load()
 
     @classmethod
     def is_valid_env(cls, env_str: str) -> bool:
@@ -245,11 +354,453 @@ class Env:
 
         return "{" + ",".join(entries) + "}"
 
-    def to_json(self):
-        return {field: val_cb(self) for field, val_cb in self.fields_to_print.items()}
+    def to_json(self, copy: bool = True):
+        """Returns the env's fields as a dict
+
+        Args:
+            copy (bool, optional): Whether `config` should be a copy that's safe to mutate. Defaults to True.
+
+        Returns:
+            Dict: Env fields, matching `EnvModel`
+        """
+        rtn = {field: val_cb(self) for field, val_cb in self.fields_to_print.items()}
+        if copy:
+            rtn["config"] = self.config.as_dict()
+        return rtn
+
+    def to_json_bytes(self) -> bytes:
+        """Returns the env validated through `EnvModel` and serialized to json bytes.
+
+        The result is cached per (env name, env toml content hash), so unchanged envs are only
+        validated and encoded once, even across `Env` instances.
+
+        Returns:
+            bytes: UTF-8 encoded json object
+        """
+        cached = self._cache.get("json_bytes")
+        if cached is not None:
+            return cached
+
+        cache_key = (self.name, self.config.content_hash)
+        if cache_key[1] is not None:
+            with _ENV_JSON_CACHE_LOCK:
+                cached = _ENV_JSON_CACHE.get(cache_key)
+                if cached is not None:
+                    _ENV_JSON_CACHE.move_to_end(cache_key)
+
+        if cached is None:
+            model = EnvModel(**self.to_json(copy=False))
+            dump_model = getattr(model, "model_dump", None) or model.dict
+            cached = dump_json(dump_model())
+
+            if cache_key[1] is not None:
+                with _ENV_JSON_CACHE_LOCK:
+                    _ENV_JSON_CACHE[cache_key] = cached
+                    while len(_ENV_JSON_CACHE) > ENV_JSON_CACHE_MAX_SIZE:
+                        _ENV_JSON_CACHE.popitem(last=False)
+
+        self._cache["json_bytes"] = cached
+        return cached
 
     def is_prod(self):
         # TODO: Maybe make an explicit flag? It'd end up effectively being an
         #       alias to `enable_env_protection, though. Two configs with similar
         #       meanings are blegh`
         return self.name == "env1"
+
+
+ENV_JSON_CACHE_MAX_SIZE = 1024
+
+_ENV_JSON_CACHE: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+_ENV_JSON_CACHE_LOCK = threading.Lock()
+
+
+def serialize_envs(envs: Iterable[Env]) -> bytes:
+    """Serializes `envs` into a single json array, reusing each env's cached `to_json_bytes()`
+
+    Args:
+        envs (Iterable[Env]): Envs to serialize
+
+    Returns:
+        bytes: UTF-8 encoded json array
+    """
+    return b"[" + b",".join(env.to_json_bytes() for env in envs) + b"]"
+
+
+PORT_MIN = 1
+PORT_MAX = 65535
+
+DEFAULT_PROXY_PORT_RANGE = (25565, PORT_MAX)
+"""Range `ProxyPortIndex.next_free()` searches by default, starting at the vanilla MC port"""
+
+_NOT_FULL_BYTE_REGEX = re.compile(rb"[^\xff]")
+
+
+class ProxyPortIndex:
+    """Tracks which env owns which proxy (Velocity) port.
+
+    Taken ports are kept in a bitmap over the whole port range (8KiB), so "is this port taken" is a
+    single byte lookup and "next free port" is a C-speed scan for the first byte with a zero bit.
+    Ports claimed by more than one env are tracked as conflicts.
+    """
+
+    _bits: bytearray
+    _owners: Dict[int, Set[str]]
+    _env_ports: Dict[str, int]
+
+    def __init__(self):
+        self._bits = bytearray((PORT_MAX + 1 + 7) // 8)
+        self._owners = {}
+        self._env_ports = {}
+
+    @classmethod
+    def from_envs(cls, envs: List["Env"]) -> "ProxyPortIndex":
+        """Builds an index from the `proxy_port` of each env in `envs`
+
+        Args:
+            envs (List[Env]): Envs to index
+
+        Returns:
+            ProxyPortIndex: Index
+        """
+        index = cls()
+        for env in envs:
+            index.set_env_port(env.name, env.proxy_port)
+        return index
+
+    @staticmethod
+    def _coerce_port(port: Any) -> Optional[int]:
+        try:
+            port = int(port)
+        except (TypeError, ValueError):
+            return None
+        return port if PORT_MIN <= port <= PORT_MAX else None
+
+    def _set_bit(self, port: int, taken: bool):
+        if taken:
+            self._bits[port >> 3] |= 1 << (port & 7)
+        else:
+            self._bits[port >> 3] &= ~(1 << (port & 7)) & 0xFF
+
+    def set_env_port(self, env_str: str, port: Any):
+        """Records that `env_str` uses `port`, replacing whatever port it had before.
+
+        Ports that aren't valid ints in range just remove the env from the index.
+
+        Args:
+            env_str (str): Env name
+            port (Any): Port number. Usually `Env.proxy_port`.
+        """
+        self.remove_env(env_str)
+
+        port = self._coerce_port(port)
+        if port is None:
+            return
+
+        self._env_ports[env_str] = port
+        self._owners.setdefault(port, set()).add(env_str)
+        self._set_bit(port, True)
+
+    def remove_env(self, env_str: str):
+        """Drops `env_str` from the index, freeing its port if no other env uses it
+
+        Args:
+            env_str (str): Env name
+        """
+        port = self._env_ports.pop(env_str, None)
+        if port is None:
+            return
+
+        owners = self._owners.get(port)
+        if owners is not None:
+            owners.discard(env_str)
+            if not owners:
+                del self._owners[port]
+                self._set_bit(port, False)
+
+    def is_taken(self, port: int) -> bool:
+        """Returns whether any env uses `port`
+
+        Args:
+            port (int): Port number
+
+        Returns:
+            bool: Whether `port` is taken
+        """
+        if not PORT_MIN <= port <= PORT_MAX:
+            return False
+        return bool(self._bits[port >> 3] & (1 << (port & 7)))
+
+    def owners(self, port: int) -> Set[str]:
+        """Returns the names of every env using `port`"""
+        return set(self._owners.get(port, ()))
+
+    def next_free(
+        self,
+        start: int = DEFAULT_PROXY_PORT_RANGE[0],
+        end: int = DEFAULT_PROXY_PORT_RANGE[1],
+    ) -> Optional[int]:
+        """Returns the lowest free port in `[start, end]`, or None if they're all taken
+
+        Args:
+            start (int, optional): First port to consider. Defaults to `DEFAULT_PROXY_PORT_RANGE[0]`.
+            end (int, optional): Last port to consider. Defaults to `DEFAULT_PROXY_PORT_RANGE[1]`.
+
+        Returns:
+            Optional[int]: Free port
+        """
+        start, end = max(start, PORT_MIN), min(end, PORT_MAX)
+        byte_idx = start >> 3
+
+        while start <= end:
+            match = _NOT_FULL_BYTE_REGEX.search(self._bits, byte_idx, (end >> 3) + 1)
+            if match is None:
+                return None
+
+            byte_idx = match.start()
+            free_bits = ~self._bits[byte_idx] & 0xFF
+            if byte_idx == start >> 3:
+                # Ignore bits below `start` in the first byte
+                free_bits &= 0xFF << (start & 7)
+
+            if free_bits:
+                port = (byte_idx << 3) + ((free_bits & -free_bits).bit_length() - 1)
+                return port if port <= end else None
+
+            byte_idx += 1
+            start = byte_idx << 3
+
+        return None
+
+    def conflicts(self) -> Dict[int, List[str]]:
+        """Returns every port used by more than one env
+
+        Returns:
+            Dict[int, List[str]]: Sorted env names keyed by the conflicting port
+        """
+        return {
+            port: sorted(owners)
+            for port, owners in self._owners.items()
+            if len(owners) > 1
+        }
+
+    def validate_port(self, port: Any, env_str: Optional[str] = None) -> int:
+        """Checks `port` is a usable proxy port for `env_str`
+
+        Args:
+            port (Any): Port number
+            env_str (Optional[str]): Env that wants the port. Its own current port isn't a conflict.
+
+        Raises:
+            InvalidPortException: If the port isn't a valid port number or another env already uses it
+
+        Returns:
+            int: The port as an int
+        """
+        coerced = self._coerce_port(port)
+        if coerced is None:
+            raise InvalidPortException(f"'{port}' is not a valid port number!")
+
+        other_owners = self.owners(coerced) - {env_str}
+        if other_owners:
+            raise InvalidPortException(
+                f"Port {coerced} is already used by {', '.join(sorted(other_owners))}!"
+            )
+
+        return coerced
+
+
+class EnvRegistry:
+    """Loads every env toml and indexes the resulting `Env`s.
+
+    Envs are loaded concurrently in a thread pool. `refresh()` only reloads envs whose toml changed on
+    disk (by `(st_mtime_ns, st_size, st_ino)`), and drops envs whose toml was removed.
+
+    Proxy ports are also tracked in `ports`, a `ProxyPortIndex` that's updated incrementally.
+
+    Eg,
+    registry = EnvRegistry()
+    registry.get("env1")
+    registry.by_alias("dev")
+    registry.by_server_type("PAPER")
+    """
+
+    DEFAULT_MAX_WORKERS = 8
+
+    env_toml_dir: Optional[Path]
+    max_workers: int
+
+    _lock: threading.Lock
+    _stat_keys: Dict[str, StatKey]
+    _envs: Dict[str, Env]
+    _by_num: Dict[int, Env]
+    _by_alias: Dict[str, Env]
+    _by_port: Dict[int, Env]
+    _by_server_type: Dict[str, List[Env]]
+
+    ports: ProxyPortIndex
+
+    def __init__(
+        self,
+        env_toml_dir: Optional[Path] = None,
+        max_workers: Optional[int] = None,
+        load: bool = True,
+    ):
+        """
+        Args:
+            env_toml_dir (Optional[Path]): Dir containing the env tomls. Defaults to `server_paths.get_env_toml_config_dir_path()`.
+            max_workers (Optional[int]): Thread pool size used while loading. Defaults to `DEFAULT_MAX_WORKERS`.
+            load (bool, optional): Whether to load all envs immediately. Defaults to True.
+        """
+        self.env_toml_dir = env_toml_dir
+        self.max_workers = (
+            max_workers if max_workers is not None else self.DEFAULT_MAX_WORKERS
+        )
+
+        self._lock = threading.Lock()
+        self._stat_keys = {}
+        self._envs = {}
+        self._by_num = {}
+        self._by_alias = {}
+        self._by_port = {}
+        self._by_server_type = {}
+
+        self.ports = ProxyPortIndex()
+
+        if load:
+            self.refresh()
+
+    def _get_env_toml_dir(self) -> Path:
+        if self.env_toml_dir is not None:
+            return self.env_toml_dir
+        return server_paths.get_env_toml_config_dir_path()
+
+    def _scan(self) -> Dict[str, StatKey]:
+        """Returns the stat keys of every valid env toml on disk, keyed by env name"""
+        stat_keys = {}
+        for toml_path in self._get_env_toml_dir().glob("env*.toml"):
+            env_str = toml_path.stem
+            if not Env.is_valid_env(env_str):
+                continue
+            try:
+                stat_keys[env_str] = get_stat_key(toml_path)
+            except FileNotFoundError:
+                continue
+        return stat_keys
+
+    def _load_env(self, env_str: str) -> Env:
+        env = Env(env_str, self._get_env_toml_dir() / f"{env_str}.toml").load()
+        # Warm the derived values we index on while we're still in the pool
+        _ = (env.alias, env.proxy_port, env.server_type)
+        return env
+
+    def refresh(self) -> Set[str]:
+        """Reloads envs whose toml changed, loads new envs, and drops removed ones.
+
+        Returns:
+            Set[str]: Names of envs that were added, reloaded, or removed
+        """
+        stat_keys = self._scan()
+
+        with self._lock:
+            to_load = [
+                env_str
+                for env_str, stat_key in stat_keys.items()
+                if self._stat_keys.get(env_str) != stat_key
+            ]
+            removed = self._envs.keys() - stat_keys.keys()
+
+        loaded: Dict[str, Env] = {}
+        if to_load:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(to_load))
+            ) as pool:
+                for env_str, env in zip(to_load, pool.map(self._load_env, to_load)):
+                    loaded[env_str] = env
+
+        if not loaded and not removed:
+            return set()
+
+        with self._lock:
+            envs = dict(self._envs)
+            envs.update(loaded)
+            for env_str in removed:
+                envs.pop(env_str, None)
+                self._stat_keys.pop(env_str, None)
+                self.ports.remove_env(env_str)
+            for env_str, env in loaded.items():
+                self._stat_keys[env_str] = stat_keys[env_str]
+                self.ports.set_env_port(env_str, env.proxy_port)
+
+            self._rebuild_indexes(envs)
+
+        logger.info(
+            f"EnvRegistry refreshed - loaded: {sorted(loaded)}, removed: {sorted(removed)}"
+        )
+        return set(loaded) | removed
+
+    def _rebuild_indexes(self, envs: Dict[str, Env]):
+        by_num: Dict[int, Env] = {}
+        by_alias: Dict[str, Env] = {}
+        by_port: Dict[int, Env] = {}
+        by_server_type: Dict[str, List[Env]] = {}
+
+        for env in sorted(envs.values()):
+            if env.num is not None:
+                by_num[env.num] = env
+            if env.alias:
+                by_alias[env.alias] = env
+            # Coerced like ProxyPortIndex, so a quoted VELOCITY_PORT is still found by number
+            port = ProxyPortIndex._coerce_port(env.proxy_port)
+            if port is not None:
+                by_port[port] = env
+            if env.server_type:
+                by_server_type.setdefault(env.server_type.upper(), []).append(env)
+
+        # Swap whole dicts so readers never see a partially built index
+        self._envs = envs
+        self._by_num = by_num
+        self._by_alias = by_alias
+        self._by_port = by_port
+        self._by_server_type = by_server_type
+
+    def __len__(self):
+        return len(self._envs)
+
+    def __contains__(self, env_str: str):
+        return env_str in self._envs
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def all(self) -> List[Env]:
+        """Returns every loaded env, sorted (env1 first)
+
+        Returns:
+            List[Env]: Envs
+        """
+        return sorted(self._envs.values())
+
+    def get(self, env_str: str) -> Optional[Env]:
+        return self._envs.get(env_str)
+
+    def by_num(self, num: int) -> Optional[Env]:
+        return self._by_num.get(num)
+
+    def by_alias(self, alias: str) -> Optional[Env]:
+        return self._by_alias.get(alias)
+
+    def by_port(self, port: int) -> Optional[Env]:
+        return self._by_port.get(ProxyPortIndex._coerce_port(port))
+
+    def by_server_type(self, server_type: ServerTypes) -> List[Env]:
+        """Returns every env running `server_type`
+
+        Args:
+            server_type (ServerTypes): Eg, "PAPER" or KnownServerTypes.PAPER
+
+        Returns:
+            List[Env]: Matching envs
+        """
+        key = getattr(server_type, "value", server_type)
+        return list(self._by_server_type.get(str(key).upper(), []))
@@ -1,7 +1,13 @@
+import hashlib
+import io
+import json
+import stat
+import tempfile
 import traceback
 import os
 
-from datetime import datetime, timezone
+from datetime import date, datetime, time, timezone
+from enum import Enum
 from typing import Optional, Dict, Callable, Any
 from pprint import pformat
 from pathlib import Path
@@ -9,19 +15,48 @@ from pathlib import Path
 from src.common.constants import DEFAULT_CHMOD_MODE
 from src.common.logger_setup import logger
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
 
 def get_now_dt() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def _file_hash(path: Path) -> Optional[str]:
+    """Returns the sha256 hexdigest of the file at `path`, or None if it doesn't exist
+
+    Args:
+        path (Path): File to hash
+
+    Returns:
+        Optional[str]: Hex digest
+    """
+    hasher = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                hasher.update(chunk)
+    except FileNotFoundError:
+        return None
+    return hasher.hexdigest()
+
+
 def write_config(
     config_path: Path,
     config: Dict,
     write_cb: Callable,
     header: str = "",
-):
+) -> bool:
     """Writes config to path with optional header and custom write cb
 
+    The config is rendered in memory first. If the result is identical to what's already on disk
+    the file is left untouched, so its mtime doesn't change. Otherwise it's written to a temp file
+    in the same directory, fsync'd, and atomically renamed over `config_path`. Symlinks are
+    followed, so the link itself is kept, and an existing file's owner and group are kept too.
+
     Also applies `constants.DEFAULT_CHMOD_MODE`
 
     Args:
@@ -29,15 +64,93 @@ def write_config(
         config (Dict): Config represented as a dict
         header (str, optional): Optional header. Defaults to "".
         write_cb (Callable, optional): Defaults to a `toml_w.dump()`.
+
+    Returns:
+        bool: True if the file on disk was changed, False if it was already up to date.
     """
 
+    # Replace the file a symlink points at rather than the symlink itself
+    config_path = Path(os.path.realpath(config_path))
     if not config_path.parent.exists():
         config_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(config_path, "wb") as f:
-        f.write(header.encode("utf8"))
-        write_cb(f, config)
-    os.chmod(config_path, DEFAULT_CHMOD_MODE)
+    buf = io.BytesIO()
+    buf.write(header.encode("utf8"))
+    write_cb(buf, config)
+    content = buf.getvalue()
+
+    try:
+        st = os.stat(config_path)
+    except FileNotFoundError:
+        st = None
+
+    if (
+        st is not None
+        and st.st_size == len(content)
+        and _file_hash(config_path) == hashlib.sha256(content).hexdigest()
+    ):
+        if stat.S_IMODE(st.st_mode) != DEFAULT_CHMOD_MODE:
+            os.chmod(config_path, DEFAULT_CHMOD_MODE)
+        logger.debug(f"'{config_path}' is unchanged - skipping write")
+        return False
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=config_path.parent, prefix=f".{config_path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, DEFAULT_CHMOD_MODE)
+        tmp_st = os.stat(tmp_path)
+        if st is not None and (st.st_uid, st.st_gid) != (tmp_st.st_uid, tmp_st.st_gid):
+            try:
+                os.chown(tmp_path, st.st_uid, st.st_gid)
+            except PermissionError:
+                logger.warning(
+                    f"Could not keep the owner/group of '{config_path}' - it will be owned by the current user"
+                )
+        os.replace(tmp_path, config_path)
+    except:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+    dir_fd = os.open(config_path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+    return True
+
+
+def dump_json(data: Any) -> bytes:
+    """Serializes `data` to json bytes, using `orjson` if it's installed and the stdlib otherwise.
+
+    Values json doesn't natively support are encoded the way `orjson` does, so the output doesn't
+    depend on whether it's installed: datetimes/dates/times as ISO 8601, enums by value, anything
+    else stringified.
+
+    Args:
+        data (Any): Data to serialize
+
+    Returns:
+        bytes: UTF-8 encoded json
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_json_default)
+    return json.dumps(
+        data, default=_json_default, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf8")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
 
 
 def log_exception(
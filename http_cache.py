@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from src.common import http_client
+from src.common.logger_setup import logger
+
+DEFAULT_TTL = 6 * 60 * 60
+"""Seconds a cached response is served without revalidating"""
+
+
+def get_default_cache_path() -> Path:
+    """Returns `$XDG_CACHE_HOME/yc-common/http.sqlite3`, defaulting to `~/.cache/yc-common/http.sqlite3`
+
+    Returns:
+        Path: Cache db path
+    """
+    base = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "yc-common" / "http.sqlite3"
+
+
+class HttpCache:
+    """On-disk cache of `GET` responses, keyed by URL.
+
+    Fresh entries (younger than `ttl`) are served without touching the network. Stale entries are
+    revalidated with `If-None-Match`/`If-Modified-Since`, so an unchanged resource costs a body-less
+    304. If the network is unreachable, or the cache is `offline`, stale entries are served as is.
+
+    Safe to share between threads and processes.
+    """
+
+    db_path: Path
+    ttl: float
+    offline: bool
+    hits: int
+    misses: int
+    revalidated: int
+    stale: int
+
+    _conn: sqlite3.Connection
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        ttl: float = DEFAULT_TTL,
+        offline: bool = False,
+    ):
+        """
+        Args:
+            db_path (Optional[Path]): SQLite db to store responses in. Defaults to `get_default_cache_path()`.
+            ttl (float, optional): Seconds to serve a response without revalidating. Defaults to DEFAULT_TTL.
+            offline (bool, optional): Never touch the network, serving whatever is cached. Defaults to False.
+        """
+        self.db_path = (
+            Path(db_path) if db_path is not None else get_default_cache_path()
+        )
+        self.ttl = ttl
+        self.offline = offline
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " body BLOB NOT NULL,"
+            " fetched_at REAL NOT NULL"
+            ")"
+        )
+
+    def _lookup(self, url: str) -> Optional[Tuple[str, str, bytes, float]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT etag, last_modified, body, fetched_at FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+
+    def _store(self, url: str, resp: requests.Response):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (
+                    url,
+                    resp.headers.get("ETag"),
+                    resp.headers.get("Last-Modified"),
+                    resp.content,
+                    time.time(),
+                ),
+            )
+
+    def _touch(self, url: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url)
+            )
+
+    def get(self, url: str) -> bytes:
+        """Returns the body of `url`, from the cache if possible
+
+        Args:
+            url (str): URL to get
+
+        Raises:
+            RuntimeError: If offline and `url` isn't cached
+            requests.RequestException: If the request failed and `url` isn't cached
+
+        Returns:
+            bytes: Response body
+        """
+        row = self._lookup(url)
+        if row is not None:
+            etag, last_modified, body, fetched_at = row
+            if time.time() - fetched_at < self.ttl:
+                self.hits += 1
+                return body
+            if self.offline:
+                self.stale += 1
+                return body
+        elif self.offline:
+            raise RuntimeError(f"Offline and '{url}' isn't in the HTTP cache!")
+
+        headers = {}
+        if row is not None:
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        try:
+            resp = http_client.get_session().get(url, headers=headers)
+            if resp.status_code == 304 and row is not None:
+                self._touch(url)
+                self.revalidated += 1
+                return body
+            resp.raise_for_status()
+        except requests.RequestException as e:
+            if row is None:
+                raise
+            logger.warning(f"Serving stale cached response for '{url}': {e}")
+            self.stale += 1
+            return body
+
+        self._store(url, resp)
+        self.misses += 1
+        return resp.content
+
+    def get_json(self, url: str) -> Any:
+        """Same as `get()`, decoding the body as json"""
+        return json.loads(self.get(url))
+
+    def invalidate(self, url: Optional[str] = None):
+        """Drops the cached response for `url`, or every response if `url` is None
+
+        Args:
+            url (Optional[str]): URL to drop. Defaults to None.
+        """
+        with self._lock:
+            if url is None:
+                self._conn.execute("DELETE FROM responses")
+            else:
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stale = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit/miss counters along with the number of cached responses
+
+        `revalidated` counts stale entries confirmed unchanged by a 304, `stale` counts stale entries
+        served because we're offline or the request failed.
+
+        Returns:
+            Dict[str, int]: Cache stats
+        """
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "stale": self.stale,
+            "size": size,
+        }
+
+
+__HTTP_CACHE: Optional[HttpCache] = None
+__HTTP_CACHE_LOCK = threading.Lock()
+
+
+def get_http_cache() -> HttpCache:
+    """Returns the shared HttpCache, creating it on first use.
+
+    `YC_HTTP_CACHE_PATH` overrides the db location and `YC_HTTP_OFFLINE=1` enables offline mode.
+
+    Returns:
+        HttpCache: Shared cache
+    """
+    global __HTTP_CACHE
+
+    cache = __HTTP_CACHE
+    if cache is not None:
+        return cache
+
+    with __HTTP_CACHE_LOCK:
+        if __HTTP_CACHE is None:
+            db_path = os.getenv("YC_HTTP_CACHE_PATH")
+            __HTTP_CACHE = HttpCache(
+                Path(db_path) if db_path else None,
+                offline=os.getenv("YC_HTTP_OFFLINE") == "1",
+            )
+        return __HTTP_CACHE
+
+
+def configure_http_cache(**kwargs: Any) -> HttpCache:
+    """Replaces the shared HttpCache with `HttpCache(**kwargs)`
+
+    Returns:
+        HttpCache: The new shared cache
+    """
+    global __HTTP_CACHE
+
+    cache = HttpCache(**kwargs)
+    with __HTTP_CACHE_LOCK:
+        old_cache, __HTTP_CACHE = __HTTP_CACHE, cache
+    if old_cache is not None:
+        old_cache.close()
+    return cache
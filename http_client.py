@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+
+import hashlib
+import os
+import threading
+import time
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import requests
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.common.logger_setup import logger
+
+Timeout = Union[float, Tuple[float, float]]
+
+DEFAULT_TIMEOUT: Timeout = (5.0, 30.0)
+"""(connect, read) timeout in seconds applied to every request that doesn't set its own"""
+
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_POOL_MAXSIZE = 16
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+
+USER_AGENT = "yc-common"
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DEFAULT_RESUME_ATTEMPTS = 3
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to requests that don't specify one"""
+
+    timeout: Timeout
+
+    def __init__(self, *args, timeout: Timeout = DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_session(
+    retries: int = DEFAULT_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    timeout: Timeout = DEFAULT_TIMEOUT,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+) -> requests.Session:
+    """Creates a pooled, keep-alive session that retries idempotent requests with exponential backoff
+
+    Connection errors and `RETRY_STATUSES` responses are retried, honouring `Retry-After`. Once
+    retries run out the last response is returned as is, so callers still decide how to handle it.
+
+    Args:
+        retries (int, optional): Max retries per request. Defaults to DEFAULT_RETRIES.
+        backoff_factor (float, optional): Sleeps `backoff_factor * 2 ** (retry - 1)` seconds between retries. Defaults to DEFAULT_BACKOFF_FACTOR.
+        timeout (Timeout, optional): Default (connect, read) timeout. Defaults to DEFAULT_TIMEOUT.
+        pool_maxsize (int, optional): Connections kept alive per host. Defaults to DEFAULT_POOL_MAXSIZE.
+
+    Returns:
+        requests.Session: Configured session
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=RETRY_METHODS,
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(
+        timeout=timeout,
+        max_retries=retry,
+        pool_connections=pool_maxsize,
+        pool_maxsize=pool_maxsize,
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+__SESSION: Optional[requests.Session] = None
+__SESSION_LOCK = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Returns the shared session every outbound call should go through, creating it on first use
+
+    Returns:
+        requests.Session: Shared session
+    """
+    global __SESSION
+
+    session = __SESSION
+    if session is not None:
+        return session
+
+    with __SESSION_LOCK:
+        if __SESSION is None:
+            __SESSION = create_session()
+        return __SESSION
+
+
+def configure_http_client(**kwargs: Any) -> requests.Session:
+    """Replaces the shared session with one created by `create_session(**kwargs)`
+
+    Eg, `configure_http_client(retries=0, timeout=1.0)` when pointing at a local test server.
+
+    Returns:
+        requests.Session: The new shared session
+    """
+    global __SESSION
+
+    session = create_session(**kwargs)
+    with __SESSION_LOCK:
+        old_session, __SESSION = __SESSION, session
+    if old_session is not None:
+        old_session.close()
+    return session
+
+
+def close_http_client():
+    """Closes the shared session's pooled connections. The next call creates a fresh session."""
+    global __SESSION
+
+    with __SESSION_LOCK:
+        old_session, __SESSION = __SESSION, None
+    if old_session is not None:
+        old_session.close()
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    """`GET`s `url` through the shared session and raises for error statuses
+
+    Args:
+        url (str): URL to get
+        **kwargs: Passed through to `requests.Session.get()`
+
+    Raises:
+        requests.HTTPError: If the final response has a 4xx/5xx status
+
+    Returns:
+        requests.Response: The response
+    """
+    resp = get_session().get(url, **kwargs)
+    resp.raise_for_status()
+    return resp
+
+
+def get_json(url: str, **kwargs: Any) -> Any:
+    """`GET`s `url` through the shared session and decodes the json body
+
+    Args:
+        url (str): URL to get
+        **kwargs: Passed through to `requests.Session.get()`
+
+    Raises:
+        requests.HTTPError: If the final response has a 4xx/5xx status
+
+    Returns:
+        Any: Decoded json
+    """
+    with get(url, **kwargs) as resp:
+        return resp.json()
+
+
+class RateLimiter:
+    """Token bucket limiting throughput in bytes per second, shareable between concurrent downloads
+
+    The bucket starts empty and holds at most one second's worth of bytes, so bursts stay small.
+    """
+
+    bytes_per_sec: float
+
+    _tokens: float
+    _last: float
+    _lock: threading.Lock
+
+    def __init__(self, bytes_per_sec: float):
+        self.bytes_per_sec = bytes_per_sec
+        self._tokens = 0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, num_bytes: int):
+        """Accounts for `num_bytes` transferred, sleeping if we're over the limit"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.bytes_per_sec,
+                self._tokens + (now - self._last) * self.bytes_per_sec,
+            )
+            self._last = now
+            self._tokens -= num_bytes
+            wait = -self._tokens / self.bytes_per_sec if self._tokens < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+def get_partial_path(dest: Path) -> Path:
+    """Returns where `download_file()` keeps the partial download of `dest`"""
+    return dest.with_name(f"{dest.name}.part")
+
+
+def _new_hashers(hashes: Dict[str, str]) -> Dict[str, "hashlib._Hash"]:
+    return {algorithm: hashlib.new(algorithm) for algorithm in hashes}
+
+
+def _stream_into(
+    url: str,
+    part_path: Path,
+    hashes: Dict[str, str],
+    on_chunk: Optional[Callable[[int], None]],
+    rate_limiter: Optional[RateLimiter],
+    **kwargs: Any,
+) -> Dict[str, "hashlib._Hash"]:
+    """Streams `url` into `part_path`, resuming from whatever is already there if the server allows it
+
+    Returns:
+        Dict[str, hashlib._Hash]: Hashers fed with the entire file
+    """
+    hashers = _new_hashers(hashes)
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    if offset > 0:
+        with open(part_path, "rb") as f:
+            while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+                for hasher in hashers.values():
+                    hasher.update(chunk)
+
+    headers = dict(kwargs.pop("headers", None) or {})
+    # Range offsets are in encoded bytes, so don't let the server compress
+    headers["Accept-Encoding"] = "identity"
+    if offset > 0:
+        headers["Range"] = f"bytes={offset}-"
+
+    with get_session().get(url, stream=True, headers=headers, **kwargs) as resp:
+        if offset > 0 and resp.status_code == 416:
+            # Our partial file is no good for this resource (eg, it changed), start over
+            part_path.unlink()
+            return _stream_into(
+                url, part_path, hashes, on_chunk, rate_limiter, **kwargs
+            )
+        resp.raise_for_status()
+
+        if offset > 0 and resp.status_code == 206:
+            logger.debug(f"Resuming download of '{url}' from byte {offset}")
+            mode = "ab"
+        else:
+            hashers = _new_hashers(hashes)
+            mode = "wb"
+
+        with open(part_path, mode) as f:
+            for chunk in resp.iter_content(DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                for hasher in hashers.values():
+                    hasher.update(chunk)
+                if rate_limiter is not None:
+                    rate_limiter.consume(len(chunk))
+                if on_chunk is not None:
+                    on_chunk(len(chunk))
+
+    return hashers
+
+
+def download_file(
+    url: str,
+    dest: Path,
+    on_chunk: Optional[Callable[[int], None]] = None,
+    hashes: Optional[Dict[str, str]] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+    resume_attempts: int = DEFAULT_RESUME_ATTEMPTS,
+    **kwargs: Any,
+) -> Path:
+    """Streams `url` into `dest` through the shared session, verifying it against `hashes`
+
+    Bytes go to `get_partial_path(dest)` and are only renamed to `dest` once complete and verified, so
+    `dest` never holds a partial file. If the transfer drops, it's resumed with an HTTP Range request,
+    and a partial file left by an earlier interrupted call is resumed the same way.
+
+    Args:
+        url (str): URL to download
+        dest (Path): File to write
+        on_chunk (Optional[Callable[[int], None]]): Called with the size of each chunk written. Raise from it to abort the download, keeping the partial file. Defaults to None.
+        hashes (Optional[Dict[str, str]]): Expected hex digests by hashlib algorithm name. Eg, Modrinth's `{"sha1": ..., "sha512": ...}`. Defaults to None.
+        rate_limiter (Optional[RateLimiter]): Limits throughput, eg shared by every download in a pipeline. Defaults to None.
+        resume_attempts (int, optional): How many times to resume after the connection drops mid-transfer. Defaults to DEFAULT_RESUME_ATTEMPTS.
+        **kwargs: Passed through to `requests.Session.get()`
+
+    Raises:
+        requests.HTTPError: If the final response has a 4xx/5xx status
+        RuntimeError: If the downloaded file doesn't match `hashes`
+
+    Returns:
+        Path: `dest`
+    """
+    dest = Path(dest)
+    hashes = {algorithm: digest.lower() for algorithm, digest in (hashes or {}).items()}
+    part_path = get_partial_path(dest)
+
+    logger.debug(f"Downloading '{url}' to '{dest}'")
+    for attempt in range(resume_attempts + 1):
+        try:
+            hashers = _stream_into(
+                url, part_path, hashes, on_chunk, rate_limiter, **kwargs
+            )
+            break
+        except (
+            requests.exceptions.ChunkedEncodingError,
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        ) as e:
+            if attempt == resume_attempts:
+                raise
+            logger.warning(f"Download of '{url}' interrupted, resuming: {e}")
+
+    for algorithm, hasher in hashers.items():
+        if hasher.hexdigest() != hashes[algorithm]:
+            part_path.unlink(missing_ok=True)
+            raise RuntimeError(
+                f"Downloaded '{url}' doesn't match its expected {algorithm}! Expected {hashes[algorithm]}, got {hasher.hexdigest()}"
+            )
+
+    os.replace(part_path, dest)
+    return dest
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+
+import atexit
+import errno
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from src.common import http_client, server_paths
+from src.common.config.config_cache import StatKey, get_stat_key, normalize_path
+from src.common.logger_setup import logger
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+HASH_CACHE_FLUSH_EVERY = 64
+"""FileHashCache writes itself out after this many new hashes, and once more at exit"""
+
+GC_MIN_AGE_SECONDS = 60 * 60
+"""`gc()` leaves blobs and staging files younger than this alone, so it doesn't race in-progress installs"""
+
+BLOB_MODE = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+"""Blobs are shared by every hardlinked install, so they're kept read-only"""
+
+
+def get_default_hash_cache_path() -> Path:
+    """Returns `$XDG_CACHE_HOME/yc-common/file-hashes.json`, defaulting to `~/.cache/yc-common/file-hashes.json`
+
+    Returns:
+        Path: Hash cache path
+    """
+    base = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "yc-common" / "file-hashes.json"
+
+
+def sha512_file(path: Path) -> str:
+    """Returns the hex sha512 of the file at `path`
+
+    Args:
+        path (Path): File to hash
+
+    Returns:
+        str: Hex digest
+    """
+    hasher = hashlib.sha512()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class FileHashCache:
+    """Remembers the sha512 of files across runs, keyed by path and validated by stat info.
+
+    A file is only re-hashed if its `(st_mtime_ns, st_size, st_ino)` changed since it was last hashed,
+    so checking an unchanged jar costs one `os.stat()`. New hashes are written out in batches of
+    `HASH_CACHE_FLUSH_EVERY` and at exit, or whenever `flush()` is called.
+    """
+
+    cache_path: Path
+    hits: int
+    misses: int
+
+    _entries: Optional[Dict[str, Tuple[StatKey, str]]]
+    _dirty: int
+    _lock: threading.Lock
+
+    def __init__(self, cache_path: Optional[Path] = None):
+        """
+        Args:
+            cache_path (Optional[Path]): Json file to persist hashes in. Defaults to `get_default_hash_cache_path()`.
+        """
+        self.cache_path = (
+            Path(cache_path)
+            if cache_path is not None
+            else get_default_hash_cache_path()
+        )
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+        self._dirty = 0
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def _load(self) -> Dict[str, Tuple[StatKey, str]]:
+        # Caller must hold `self._lock`
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.cache_path, "r") as f:
+                    for path, (stat_key, sha512) in json.load(f).items():
+                        self._entries[path] = (tuple(stat_key), sha512)
+            except FileNotFoundError:
+                pass
+            except (ValueError, TypeError):
+                logger.warning(
+                    f"Ignoring unreadable file hash cache '{self.cache_path}'"
+                )
+        return self._entries
+
+    def _save(self):
+        # Caller must hold `self._lock`
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.cache_path)
+        except:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def _flush(self):
+        # Caller must hold `self._lock`
+        if not self._dirty:
+            return
+
+        try:
+            self._save()
+        except OSError:
+            logger.warning(f"Could not save file hash cache '{self.cache_path}'")
+        self._dirty = 0
+
+    def flush(self):
+        """Writes any hashes not yet saved to `cache_path`"""
+        with self._lock:
+            self._flush()
+
+    def sha512(self, path: Path) -> str:
+        """Returns the hex sha512 of the file at `path`, only hashing it if it changed
+
+        Args:
+            path (Path): File to hash
+
+        Returns:
+            str: Hex digest
+        """
+        path = normalize_path(path)
+        stat_key = get_stat_key(path)
+        with self._lock:
+            entry = self._load().get(str(path))
+        if entry is not None and entry[0] == stat_key:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        sha512 = sha512_file(path)
+        with self._lock:
+            self._load()[str(path)] = (stat_key, sha512)
+            self._dirty += 1
+            if self._dirty >= HASH_CACHE_FLUSH_EVERY:
+                self._flush()
+        return sha512
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit/miss counters
+
+        Returns:
+            Dict[str, int]: Cache stats
+        """
+        return {"hits": self.hits, "misses": self.misses}
+
+
+__FILE_HASH_CACHE: Optional[FileHashCache] = None
+__FILE_HASH_CACHE_LOCK = threading.Lock()
+
+
+def cached_sha512(path: Path) -> str:
+    """Returns the hex sha512 of the file at `path` using the shared FileHashCache
+
+    Args:
+        path (Path): File to hash
+
+    Returns:
+        str: Hex digest
+    """
+    global __FILE_HASH_CACHE
+
+    cache = __FILE_HASH_CACHE
+    if cache is None:
+        with __FILE_HASH_CACHE_LOCK:
+            if __FILE_HASH_CACHE is None:
+                __FILE_HASH_CACHE = FileHashCache()
+            cache = __FILE_HASH_CACHE
+
+    return cache.sha512(path)
+
+
+class JarStore:
+    """Content-addressed store of plugin/mod jars, keyed by sha512, shared by every env.
+
+    Envs get hardlinks to the stored blobs rather than their own copies, so a jar used by N envs is
+    downloaded and stored once. A blob's link count tells us how many installs still use it, which is
+    what `gc()` uses to find unreferenced blobs. If the install dir is on a different filesystem, the
+    blob is copied instead.
+
+    Layout: `{root}/blobs/{sha512[:2]}/{sha512}.jar`, with in-progress writes staged in `{root}/tmp`.
+    """
+
+    root: Path
+
+    def __init__(self, root: Optional[Path] = None):
+        """
+        Args:
+            root (Optional[Path]): Store directory. Defaults to `server_paths.get_jar_store_path()`.
+        """
+        self.root = (
+            Path(root) if root is not None else server_paths.get_jar_store_path()
+        )
+
+    @property
+    def blobs_dir(self) -> Path:
+        return self.root / "blobs"
+
+    @property
+    def tmp_dir(self) -> Path:
+        return self.root / "tmp"
+
+    def blob_path(self, sha512: str) -> Path:
+        sha512 = sha512.lower()
+        return self.blobs_dir / sha512[:2] / f"{sha512}.jar"
+
+    def has(self, sha512: str) -> bool:
+        return self.blob_path(sha512).exists()
+
+    def staging_path(self, sha512: str) -> Path:
+        """Returns where to download a blob to before `add_file()`
+
+        Being on the same filesystem as the blobs keeps `add_file()` a rename, and the path being
+        stable per hash lets an interrupted download resume on the next attempt.
+
+        Args:
+            sha512 (str): Expected hash of the file that'll be written
+
+        Returns:
+            Path: Staging path
+        """
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        return self.tmp_dir / f"{sha512.lower()}.jar"
+
+    def add_file(
+        self, src: Path, sha512: Optional[str] = None, verify: bool = True
+    ) -> Path:
+        """Moves `src` into the store, verifying its hash
+
+        Args:
+            src (Path): File to add. Moved if it's on the store's filesystem, copied otherwise.
+            sha512 (Optional[str]): Expected hash. Computed from `src` if None.
+            verify (bool, optional): Set False if `src` was already verified against `sha512`, eg by `http_client.download_file()`. Defaults to True.
+
+        Raises:
+            RuntimeError: If `src` doesn't hash to `sha512`
+
+        Returns:
+            Path: Path of the stored blob
+        """
+        if sha512 is not None and not verify:
+            actual = sha512.lower()
+        else:
+            actual = sha512_file(src)
+        if sha512 is not None and actual != sha512.lower():
+            src.unlink(missing_ok=True)
+            raise RuntimeError(
+                f"Hash mismatch adding '{src}' to the jar store! Expected sha512 {sha512}, got {actual}"
+            )
+
+        blob_path = self.blob_path(actual)
+        if blob_path.exists():
+            src.unlink(missing_ok=True)
+            return blob_path
+
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        os.chmod(src, BLOB_MODE)
+        try:
+            os.replace(src, blob_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.copy2(src, blob_path)
+            src.unlink(missing_ok=True)
+        return blob_path
+
+    def fetch(self, url: str, sha512: str) -> Path:
+        """Returns the stored blob for `sha512`, downloading it from `url` if it isn't stored yet
+
+        Args:
+            url (str): Where to download the jar from
+            sha512 (str): Expected hash of the jar
+
+        Raises:
+            RuntimeError: If the download doesn't hash to `sha512`
+
+        Returns:
+            Path: Path of the stored blob
+        """
+        blob_path = self.blob_path(sha512)
+        if blob_path.exists():
+            logger.debug(f"Jar store hit for '{url}'")
+            return blob_path
+
+        staging_path = self.staging_path(sha512)
+        http_client.download_file(url, staging_path, hashes={"sha512": sha512})
+        return self.add_file(staging_path, sha512, verify=False)
+
+    def install(self, sha512: str, dest: Path) -> Path:
+        """Hardlinks the blob for `sha512` to `dest`, replacing whatever is there
+
+        Falls back to copying if `dest` is on another filesystem.
+
+        Args:
+            sha512 (str): Hash of a stored blob
+            dest (Path): Where to install it. Eg, `{env defaultmods dir}/{filename}.jar`
+
+        Raises:
+            FileNotFoundError: If `sha512` isn't in the store
+
+        Returns:
+            Path: `dest`
+        """
+        blob_path = self.blob_path(sha512)
+        if not blob_path.exists():
+            raise FileNotFoundError(f"sha512 {sha512} isn't in the jar store!")
+
+        dest = Path(dest)
+        if dest.exists() and os.path.samefile(blob_path, dest):
+            return dest
+
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dest = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+        tmp_dest.unlink(missing_ok=True)
+        try:
+            os.link(blob_path, tmp_dest)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+            logger.debug(f"Can't hardlink into '{dest.parent}', copying instead")
+            shutil.copy2(blob_path, tmp_dest)
+        os.replace(tmp_dest, dest)
+        return dest
+
+    def gc(self, min_age: float = GC_MIN_AGE_SECONDS) -> Dict[str, int]:
+        """Removes blobs that no install links to anymore, plus abandoned staging files
+
+        Args:
+            min_age (float, optional): Only remove files last modified at least this many seconds ago. Defaults to GC_MIN_AGE_SECONDS.
+
+        Returns:
+            Dict[str, int]: Number of blobs removed and bytes freed
+        """
+        removed = 0
+        freed = 0
+        cutoff = time.time() - min_age
+        if self.blobs_dir.exists():
+            for blob_path in self.blobs_dir.glob("*/*.jar"):
+                try:
+                    st = blob_path.stat()
+                except FileNotFoundError:
+                    continue
+                if st.st_nlink > 1 or st.st_mtime > cutoff:
+                    continue
+                blob_path.unlink(missing_ok=True)
+                removed += 1
+                freed += st.st_size
+
+        if self.tmp_dir.exists():
+            for tmp_path in self.tmp_dir.iterdir():
+                try:
+                    if tmp_path.stat().st_mtime < cutoff:
+                        tmp_path.unlink(missing_ok=True)
+                except FileNotFoundError:
+                    pass
+
+        logger.info(f"Jar store gc removed {removed} blobs, freeing {freed} bytes")
+        return {"removed": removed, "freed_bytes": freed}
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of stored blobs and their total size
+
+        Returns:
+            Dict[str, int]: Store stats
+        """
+        blobs = 0
+        size = 0
+        if self.blobs_dir.exists():
+            for blob_path in self.blobs_dir.glob("*/*.jar"):
+                blobs += 1
+                size += blob_path.stat().st_size
+        return {"blobs": blobs, "bytes": size}
@@ -1,8 +1,9 @@
 import zipfile
-import yaml  # type: ignore
 import json
 from pathlib import Path
 
+from src.common.config.yaml_backend import load_yaml
+
 
 class BaseHandler:
     data: dict
@@ -23,7 +24,7 @@ class JsonHandler(BaseHandler):
 class YamlHandler(BaseHandler):
     def __init__(self, file: zipfile.Path):
         with file.open("r") as f:
-            self.data = yaml.load(f.read())
+            self.data = load_yaml(f.read())
 
 
 PLUGINMOD_INFO_FILE = {
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+
+import re
+import threading
+
+from bisect import bisect_left, bisect_right
+from functools import total_ordering
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+MC_VERSION_REGEX = re.compile(
+    r"^\s*(?P<release>\d+(?:\.\d+)*)(?:[-\s]*(?P<stage>pre|rc)[-\s]*(?P<stage_num>\d*))?\s*$",
+    re.IGNORECASE,
+)
+
+STAGE_ORDER = {
+    "pre": 0,
+    "rc": 1,
+    "": 2,  # Full release
+}
+
+McVersionKey = Tuple[Tuple[int, ...], int, int]
+
+
+@total_ordering
+class McVersion:
+    """A parsed, interned Minecraft version. Eg, `1.19`, `1.20.4`, `1.21-pre1`, `1.20.5-rc2`
+
+    Versions compare numerically rather than as strings, so `McVersion("1.9") < McVersion("1.19")`.
+    Trailing zeros don't matter (`1.19 == 1.19.0`), and pre-releases sort before release candidates,
+    which sort before the full release.
+
+    Parsing is cached and instances are interned per version string, so `McVersion("1.20.4")` is
+    cheap to call repeatedly and always returns the same object.
+
+    Comparisons also accept plain version strings, eg `McVersion("1.20") >= "1.19"`.
+    """
+
+    __slots__ = ("raw", "key", "_hash")
+
+    raw: str
+    key: McVersionKey
+    _hash: int
+
+    _interned: Dict[str, "McVersion"] = {}
+    _interned_lock = threading.Lock()
+
+    def __new__(cls, version: Union[str, "McVersion"]):
+        if isinstance(version, McVersion):
+            return version
+
+        interned = cls._interned.get(version)
+        if interned is not None:
+            return interned
+
+        match = MC_VERSION_REGEX.match(version)
+        if match is None:
+            raise ValueError(f"'{version}' is not a valid Minecraft version!")
+
+        release = [int(part) for part in match.group("release").split(".")]
+        while len(release) > 1 and release[-1] == 0:
+            release.pop()
+
+        stage = (match.group("stage") or "").lower()
+        stage_num = int(match.group("stage_num") or 0)
+
+        obj = super().__new__(cls)
+        obj.raw = version
+        obj.key = (tuple(release), STAGE_ORDER[stage], stage_num)
+        obj._hash = hash(obj.key)
+
+        with cls._interned_lock:
+            return cls._interned.setdefault(version, obj)
+
+    def __reduce__(self):
+        return (McVersion, (self.raw,))
+
+    @classmethod
+    def parse(cls, version: Union[str, "McVersion"]) -> "McVersion":
+        """Same as `McVersion(version)`
+
+        Raises:
+            ValueError: If `version` isn't a valid Minecraft version
+        """
+        return cls(version)
+
+    @classmethod
+    def try_parse(
+        cls, version: Optional[Union[str, "McVersion"]]
+    ) -> Optional["McVersion"]:
+        """Like `parse()`, but returns None instead of raising for invalid versions (eg, snapshots)"""
+        if version is None:
+            return None
+        try:
+            return cls(version)
+        except (ValueError, TypeError):
+            return None
+
+    @property
+    def release(self) -> Tuple[int, ...]:
+        """The numeric release parts, without trailing zeros. Eg, `(1, 20, 4)`"""
+        return self.key[0]
+
+    @property
+    def is_prerelease(self) -> bool:
+        return self.key[1] != STAGE_ORDER[""]
+
+    def __str__(self):
+        return self.raw
+
+    def __repr__(self):
+        return f"McVersion({self.raw!r})"
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if isinstance(other, str):
+            other = McVersion.try_parse(other)
+        if not isinstance(other, McVersion):
+            return NotImplemented
+        return self.key == other.key
+
+    def __lt__(self, other):
+        if isinstance(other, str):
+            other = McVersion(other)
+        if not isinstance(other, McVersion):
+            return NotImplemented
+        return self.key < other.key
+
+
+RANGE_CLAUSE_REGEX = re.compile(
+    r"^\s*(?P<op>>=|<=|==|!=|>|<|=)?\s*(?P<version>.+?)\s*$"
+)
+
+
+class McVersionRange:
+    """A set of version constraints, eg `McVersionRange(">=1.19,<1.21")`
+
+    Clauses are comma separated and all must match. Supported operators are `>=`, `>`, `<=`, `<`,
+    `==` (or `=` or no operator), and `!=`.
+    """
+
+    __slots__ = (
+        "spec",
+        "clauses",
+        "lower",
+        "lower_inclusive",
+        "upper",
+        "upper_inclusive",
+    )
+
+    spec: str
+    clauses: Tuple[Tuple[str, McVersion], ...]
+    lower: Optional[McVersion]
+    lower_inclusive: bool
+    upper: Optional[McVersion]
+    upper_inclusive: bool
+
+    def __init__(self, spec: str):
+        """
+        Args:
+            spec (str): Comma separated version constraints
+
+        Raises:
+            ValueError: If any clause isn't a valid constraint
+        """
+        self.spec = spec
+        clauses = []
+        for clause in spec.split(","):
+            if not clause.strip():
+                continue
+            match = RANGE_CLAUSE_REGEX.match(clause)
+            if match is None:
+                raise ValueError(f"Invalid version constraint: '{clause}'")
+            op = match.group("op") or "=="
+            clauses.append(
+                ("==" if op == "=" else op, McVersion(match.group("version")))
+            )
+        self.clauses = tuple(clauses)
+
+        # Tightest bounds, used to bisect sorted version lists
+        self.lower, self.lower_inclusive = None, True
+        self.upper, self.upper_inclusive = None, True
+        for op, version in self.clauses:
+            if op in (">=", ">", "=="):
+                inclusive = op != ">"
+                if (
+                    self.lower is None
+                    or version > self.lower
+                    or (version == self.lower and not inclusive)
+                ):
+                    self.lower, self.lower_inclusive = version, inclusive
+            if op in ("<=", "<", "=="):
+                inclusive = op != "<"
+                if (
+                    self.upper is None
+                    or version < self.upper
+                    or (version == self.upper and not inclusive)
+                ):
+                    self.upper, self.upper_inclusive = version, inclusive
+
+    def __repr__(self):
+        return f"McVersionRange({self.spec!r})"
+
+    def __contains__(self, version: Union[str, McVersion]) -> bool:
+        version = McVersion.try_parse(version)
+        if version is None:
+            return False
+
+        for op, bound in self.clauses:
+            if op == ">=" and not version >= bound:
+                return False
+            if op == ">" and not version > bound:
+                return False
+            if op == "<=" and not version <= bound:
+                return False
+            if op == "<" and not version < bound:
+                return False
+            if op == "==" and not version == bound:
+                return False
+            if op == "!=" and version == bound:
+                return False
+        return True
+
+    def filter(self, versions: Iterable[Union[str, McVersion]]) -> List[McVersion]:
+        """Returns every parseable version in `versions` that's within this range, in input order"""
+        return [
+            version
+            for version in (McVersion.try_parse(v) for v in versions)
+            if version is not None and version in self
+        ]
+
+    def filter_sorted(self, sorted_versions: Sequence[McVersion]) -> List[McVersion]:
+        """Returns the versions within this range from an already sorted list.
+
+        Bisects on the range's bounds, so only the `!=` clauses need checking per version.
+
+        Args:
+            sorted_versions (Sequence[McVersion]): Versions sorted ascending. See `sort_versions()`.
+
+        Returns:
+            List[McVersion]: Versions within this range, ascending
+        """
+        lo, hi = 0, len(sorted_versions)
+        if self.lower is not None:
+            bisect_fn = bisect_left if self.lower_inclusive else bisect_right
+            lo = bisect_fn(sorted_versions, self.lower)
+        if self.upper is not None:
+            bisect_fn = bisect_right if self.upper_inclusive else bisect_left
+            hi = bisect_fn(sorted_versions, self.upper)
+
+        excluded = [bound for op, bound in self.clauses if op == "!="]
+        return [v for v in sorted_versions[lo:hi] if v not in excluded]
+
+
+def sort_versions(versions: Iterable[Union[str, McVersion]]) -> List[McVersion]:
+    """Parses and sorts `versions` ascending, dropping anything that isn't a valid version (eg, snapshots)
+
+    Args:
+        versions (Iterable[Union[str, McVersion]]): Versions to sort
+
+    Returns:
+        List[McVersion]: Sorted versions
+    """
+    parsed = (McVersion.try_parse(version) for version in versions)
+    return sorted(version for version in parsed if version is not None)
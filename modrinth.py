@@ -1,16 +1,34 @@
-from dataclasses import dataclass
-from typing import Optional
-import requests
-import urllib.request
-
-from pprint import pformat
-
-from src.common import server_paths
-from src.common.types import ServerTypes
+import json
+import math
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from src.common import http_client, server_paths
+from src.common.downloader import DownloadPipeline, DownloadResult, DownloadTask
+from src.common.jar_store import JarStore
+from src.common.types import KnownServerTypes, ServerTypes
 from src.common.environment import Env
 from src.common.logger_setup import logger
+from src.common.modrinth_backends import MODRINTH_API_URL, get_modrinth_backend
+from src.common.mc_version import McVersion
+
+MODRINTH_VERSION_PATH_FMT = (
+    '/project/{project_id}/version?game_versions=["{mc_version}"]&loaders=["{loader}"]'
+)
+MODRINTH_VERSION_URL_FMT = MODRINTH_API_URL + MODRINTH_VERSION_PATH_FMT
+MODRINTH_PROJECTS_PATH_FMT = "/projects?ids={ids}"
+MODRINTH_VERSIONS_PATH_FMT = "/versions?ids={ids}"
+MODRINTH_BATCH_SIZE = 100
+"""Max ids per bulk request, keeps URLs well under common length limits"""
+MODRINTH_MAX_CONCURRENT_REQUESTS = 8
 
-MODRINTH_VERSION_URL_FMT = 'https://api.modrinth.com/v2/project/{project_id}/version?game_versions=["{mc_version}"]&loaders=["{loader}"]'
+PLUGIN_LOADERS = {"paper", "bukkit", "spigot", "purpur", "folia"}
+"""Loaders whose jars go in the plugins dir rather than the mods dir"""
+
+VERSION_TYPE_PREFERENCE = {"release": 2, "beta": 1, "alpha": 0}
 
 FABRICPROXY_LITE_PROJECT_ID = "8dI2tmqs"
 
@@ -60,6 +78,41 @@ class PluginModDefinition:
                 "Got an invalid PluginModDefinition - mod_mc_version was None! Must be a string of the target mod version."
             )
 
+    @property
+    def mc_version(self) -> Optional[McVersion]:
+        """Returns the parsed `mod_mc_version`, or None if it isn't a release version (eg, a snapshot)
+
+        Returns:
+            Optional[McVersion]: Parsed Minecraft version
+        """
+        return McVersion.try_parse(self.mod_mc_version)
+
+    @property
+    def loader(self) -> str:
+        """Returns the Modrinth loader name for `server_type`. Eg, "fabric", "paper"
+
+        Returns:
+            str: Lowercase loader name
+        """
+        server_type = self.server_type
+        if isinstance(server_type, KnownServerTypes):
+            server_type = server_type.value
+        return server_type.lower()
+
+    def supports_game_versions(self, game_versions: Iterable[str]) -> bool:
+        """Returns whether `game_versions` (from a Modrinth project or version) includes `mod_mc_version`
+
+        Args:
+            game_versions (Iterable[str]): Game versions to check
+
+        Returns:
+            bool: True if any of `game_versions` matches
+        """
+        mc_version = self.mc_version
+        if mc_version is None:
+            return self.mod_mc_version in game_versions
+        return mc_version in game_versions
+
     @property
     def server_type(self):
         """Returns the `server_type` this PluginModDefinition was instantiated with
@@ -92,12 +145,636 @@ class PluginModDefinition:
         )
 
 
-def download_mod(pluginmod_definition: PluginModDefinition, env_name: str):
+@dataclass
+class PlannedDownload:
+    """A resolved Modrinth project version file, ready to download"""
+
+    definition: PluginModDefinition
+    project_id: str
+    version_id: str
+    version_number: str
+    filename: str
+    url: str
+    size: Optional[int] = None
+    hashes: Dict[str, str] = field(default_factory=dict)
+    dependencies: List[Dict] = field(default_factory=list)
+    """The version's Modrinth dependency objects, with `project_id`, `version_id`, and `dependency_type`"""
+
+
+@dataclass
+class DownloadPlan:
+    """The result of resolving a batch of PluginModDefinitions"""
+
+    downloads: List[PlannedDownload] = field(default_factory=list)
+    unresolved: Dict[str, str] = field(default_factory=dict)
+    """Project ids that couldn't be resolved, mapped to the reason"""
+    request_count: int = 0
+    """Number of Modrinth API requests made (or served from cache) while resolving"""
+
+    @property
+    def total_size(self) -> int:
+        return sum(download.size or 0 for download in self.downloads)
+
+
+def _chunks(items: List[str], size: int) -> List[List[str]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _bulk_get(path_fmt: str, ids: Iterable[str], plan: DownloadPlan) -> List[Dict]:
+    """Fetches `ids` from a Modrinth bulk endpoint in `MODRINTH_BATCH_SIZE` chunks, concurrently"""
+    paths = [
+        path_fmt.format(ids=json.dumps(chunk, separators=(",", ":")))
+        for chunk in _chunks(sorted(set(ids)), MODRINTH_BATCH_SIZE)
+    ]
+    plan.request_count += len(paths)
+
+    backend = get_modrinth_backend()
+    with ThreadPoolExecutor(max_workers=MODRINTH_MAX_CONCURRENT_REQUESTS) as executor:
+        results = list(executor.map(backend.get_json, paths))
+    return [item for result in results for item in result]
+
+
+VersionQueryKey = Tuple[str, str, str]
+"""(project id, loader, Minecraft version)"""
+
+
+def _filtered_get(
+    keys: Iterable[VersionQueryKey], plan: DownloadPlan
+) -> Dict[VersionQueryKey, List[Dict]]:
+    """Fetches the versions matching each (project, loader, Minecraft version), one filtered query each, concurrently"""
+    keys = sorted(set(keys))
+    paths = [
+        MODRINTH_VERSION_PATH_FMT.format(
+            project_id=project_id, loader=loader, mc_version=mc_version
+        )
+        for project_id, loader, mc_version in keys
+    ]
+    plan.request_count += len(paths)
+
+    backend = get_modrinth_backend()
+    with ThreadPoolExecutor(max_workers=MODRINTH_MAX_CONCURRENT_REQUESTS) as executor:
+        results = list(executor.map(backend.get_json, paths))
+    return dict(zip(keys, results))
+
+
+def get_primary_file(project_version: Dict) -> Dict:
+    """Returns the file Modrinth marks as primary for a project version, or its first file
+
+    Args:
+        project_version (Dict): Modrinth version object with at least one file
+
+    Returns:
+        Dict: Modrinth file object, with `url`, `filename`, `hashes`, etc
+    """
+    files = project_version["files"]
+    return next((f for f in files if f.get("primary")), files[0])
+
+
+def select_best_version(
+    definition: PluginModDefinition, project_versions: Iterable[Dict]
+) -> Optional[Dict]:
+    """Picks the best version of a project for `definition`'s loader and game version
+
+    Releases are preferred over betas over alphas, then the most recently published wins.
+
+    Args:
+        definition (PluginModDefinition): What the version needs to support
+        project_versions (Iterable[Dict]): Modrinth version objects of a single project
+
+    Returns:
+        Optional[Dict]: The best matching version object, or None if none match
+    """
+    loader = definition.loader
+    best: Optional[Dict] = None
+    best_key: Any = None
+    for project_version in project_versions:
+        if loader not in project_version.get("loaders", ()):
+            continue
+        if not definition.supports_game_versions(
+            project_version.get("game_versions", ())
+        ):
+            continue
+        if not project_version.get("files"):
+            continue
+
+        key = (
+            VERSION_TYPE_PREFERENCE.get(project_version.get("version_type"), -1),
+            project_version.get("date_published", ""),
+        )
+        if best is None or key > best_key:
+            best, best_key = project_version, key
+    return best
+
+
+def _planned_download(
+    definition: PluginModDefinition, project_version: Dict
+) -> PlannedDownload:
+    file_data = get_primary_file(project_version)
+    return PlannedDownload(
+        definition=definition,
+        project_id=project_version["project_id"],
+        version_id=project_version["id"],
+        version_number=project_version.get("version_number", ""),
+        filename=file_data["filename"],
+        url=file_data["url"],
+        size=file_data.get("size"),
+        hashes=file_data.get("hashes", {}),
+        dependencies=project_version.get("dependencies") or [],
+    )
+
+
+def resolve_pluginmods(definitions: Iterable[PluginModDefinition]) -> DownloadPlan:
+    """Resolves every definition to a downloadable file with as few Modrinth requests as possible.
+
+    Uses the bulk `/projects` endpoint to find every project's versions, skipping projects that don't
+    support the requested loader/game version at all. The remaining candidates are then fetched with
+    whichever takes fewer requests: one filtered `/project/{id}/version` query per (project, loader,
+    Minecraft version), run concurrently, or the bulk `/versions` endpoint for every version id of
+    every candidate project. Popular projects have hundreds of versions, so the filtered queries
+    usually win. Bulk requests are batched by `MODRINTH_BATCH_SIZE` ids, and everything goes through
+    the current Modrinth backend.
+
+    Args:
+        definitions (Iterable[PluginModDefinition]): Plugins/mods to resolve
+
+    Returns:
+        DownloadPlan: One PlannedDownload per resolved definition, plus the reasons for any that weren't
+    """
+    definitions = list(definitions)
+    plan = DownloadPlan()
+    if not definitions:
+        return plan
+
+    projects: Dict[str, Dict] = {}
+    for project in _bulk_get(
+        MODRINTH_PROJECTS_PATH_FMT, (d.project_id for d in definitions), plan
+    ):
+        projects[project["id"]] = project
+        projects[project.get("slug", project["id"])] = project
+
+    candidates: Dict[str, List[str]] = {}
+    for definition in definitions:
+        project = projects.get(definition.project_id)
+        if project is None:
+            plan.unresolved[definition.project_id] = "Project not found"
+        elif definition.loader not in project.get("loaders", ()):
+            plan.unresolved[definition.project_id] = (
+                f"Project has no versions for loader '{definition.loader}'"
+            )
+        elif not definition.supports_game_versions(project.get("game_versions", ())):
+            plan.unresolved[definition.project_id] = (
+                f"Project has no versions for Minecraft '{definition.mod_mc_version}'"
+            )
+        else:
+            candidates[definition.project_id] = project.get("versions", [])
+
+    query_keys = {
+        (projects[d.project_id]["id"], d.loader, d.mod_mc_version)
+        for d in definitions
+        if d.project_id in candidates
+    }
+    version_ids = {version_id for ids in candidates.values() for version_id in ids}
+    versions_by_key: Dict[VersionQueryKey, List[Dict]] = {}
+    if math.ceil(len(version_ids) / MODRINTH_BATCH_SIZE) < len(query_keys):
+        versions_by_project: Dict[str, List[Dict]] = {}
+        for project_version in _bulk_get(MODRINTH_VERSIONS_PATH_FMT, version_ids, plan):
+            versions_by_project.setdefault(project_version["project_id"], []).append(
+                project_version
+            )
+        for key in query_keys:
+            versions_by_key[key] = versions_by_project.get(key[0], [])
+    else:
+        versions_by_key = _filtered_get(query_keys, plan)
+
+    for definition in definitions:
+        if definition.project_id not in candidates:
+            continue
+
+        project_id = projects[definition.project_id]["id"]
+        best = select_best_version(
+            definition,
+            versions_by_key.get(
+                (project_id, definition.loader, definition.mod_mc_version), ()
+            ),
+        )
+        if best is None:
+            plan.unresolved[definition.project_id] = (
+                f"No version supports '{definition.loader}' on Minecraft '{definition.mod_mc_version}'"
+            )
+            continue
+
+        plan.downloads.append(_planned_download(definition, best))
+
+    return plan
+
+
+InstallGroup = Tuple[Optional[str], str, str]
+"""(env name, loader, Minecraft version). Dependencies are installed in the group of the mod requiring them."""
+
+
+def _install_group(definition: PluginModDefinition) -> InstallGroup:
+    env_name = definition._env.name if definition._env is not None else None
+    return (env_name, definition.loader, definition.mod_mc_version)
+
+
+def _find_cycles(edges: Dict[str, List[str]]) -> List[List[str]]:
+    """Returns every cycle a depth-first walk of `edges` runs into, as paths like `["A", "B", "A"]`"""
+    cycles: List[List[str]] = []
+    visiting: Set[str] = set()
+    done: Set[str] = set()
+    path: List[str] = []
+
+    def visit(node: str):
+        visiting.add(node)
+        path.append(node)
+        for child in edges.get(node, ()):
+            if child in visiting:
+                cycles.append(path[path.index(child) :] + [child])
+            elif child not in done:
+                visit(child)
+        path.pop()
+        visiting.remove(node)
+        done.add(node)
+
+    for node in list(edges):
+        if node not in done:
+            visit(node)
+    return cycles
+
+
+@dataclass
+class DependencyResolution:
+    """The result of resolving root PluginModDefinitions along with their required dependencies"""
+
+    plan: DownloadPlan = field(default_factory=DownloadPlan)
+    """Flattened install set - every root and transitive required dependency, once per env"""
+    required_by: Dict[str, Set[str]] = field(default_factory=dict)
+    """Dependency project ids mapped to the project ids that required them"""
+    conflicts: List[str] = field(default_factory=list)
+    cycles: List[List[str]] = field(default_factory=list)
+    """Dependency cycles as project id paths, eg `["A", "B", "A"]`. They're still installable."""
+    levels: int = 0
+    """Depth of the dependency graph, ie the number of rounds of lookups"""
+
+    def raise_for_conflicts(self):
+        """Raises a RuntimeError listing the conflicts, if there are any
+
+        Raises:
+            RuntimeError: If any installed mods conflict
+        """
+        if not self.conflicts:
+            return
+        raise RuntimeError(
+            f"Found {len(self.conflicts)} Modrinth dependency conflict(s)! {'; '.join(self.conflicts)}"
+        )
+
+
+class DependencyResolver:
+    """Resolves PluginModDefinitions plus their transitive required dependencies, breadth-first.
+
+    Each level of the dependency graph is looked up in a single `resolve_pluginmods()` round, so all
+    of a level's lookups run concurrently. Lookups are memoized per (project, loader, Minecraft
+    version) for the lifetime of the resolver, so a dependency shared by many mods or envs (eg,
+    Fabric API) is looked up once.
+
+    Dependencies are installed to the same env, for the same loader and Minecraft version, as the
+    mod requiring them. Only `required` dependencies are followed. Dependencies pinned to a version
+    install exactly that version, fetched in bulk with the rest of the level's pins. Conflicts are
+    reported for `incompatible` dependencies that end up installed together, and for pinned
+    dependencies that end up installed at another version (eg, a root or another mod wanted a
+    different one). Not thread-safe, use one resolver per thread.
+    """
+
+    request_count: int
+    """Modrinth API requests made by this resolver so far"""
+
+    _memo: Dict[Tuple[str, str, str], Union[PlannedDownload, str]]
+    """Resolved version, or the reason it couldn't be, by (project id, loader, Minecraft version)"""
+    _versions: Dict[str, Optional[Dict]]
+    """Pinned or project-less dependency versions by id, None if Modrinth doesn't have them"""
+
+    def __init__(self):
+        self.request_count = 0
+        self._memo = {}
+        self._versions = {}
+
+    @staticmethod
+    def _memo_key(definition: PluginModDefinition) -> Tuple[str, str, str]:
+        return (definition.project_id, definition.loader, definition.mod_mc_version)
+
+    def _lookup(self, definitions: Iterable[PluginModDefinition]):
+        """Resolves every definition that isn't memoized yet in one bulk round"""
+        misses: Dict[Tuple[str, str, str], PluginModDefinition] = {}
+        for definition in definitions:
+            key = self._memo_key(definition)
+            if key not in self._memo:
+                misses.setdefault(key, definition)
+        if not misses:
+            return
+
+        plan = resolve_pluginmods(misses.values())
+        self.request_count += plan.request_count
+        for download in plan.downloads:
+            project_key = self._memo_key(download.definition)
+            self._memo[project_key] = download
+            # Roots may be given by slug, but dependencies always use the id
+            self._memo[(download.project_id,) + project_key[1:]] = download
+        for key, definition in misses.items():
+            if key not in self._memo:
+                self._memo[key] = plan.unresolved.get(
+                    definition.project_id, "Project not found"
+                )
+
+    def _lookup_versions(self, version_ids: Iterable[str]):
+        missing = {v for v in version_ids if v not in self._versions}
+        if not missing:
+            return
+
+        plan = DownloadPlan()
+        for project_version in _bulk_get(MODRINTH_VERSIONS_PATH_FMT, missing, plan):
+            self._versions[project_version["id"]] = project_version
+        for version_id in missing:
+            self._versions.setdefault(version_id, None)
+        self.request_count += plan.request_count
+
+    def _dependency_project_id(self, dependency: Dict) -> Optional[str]:
+        if dependency.get("project_id"):
+            return dependency["project_id"]
+        project_version = self._versions.get(dependency.get("version_id") or "")
+        return project_version["project_id"] if project_version else None
+
+    def _resolve_pinned(
+        self, definition: PluginModDefinition, version_id: str
+    ) -> Union[PlannedDownload, str]:
+        project_version = self._versions.get(version_id)
+        if project_version is None:
+            return f"Pinned version '{version_id}' not found"
+        if not project_version.get("files"):
+            return f"Pinned version '{version_id}' has no files"
+        return _planned_download(definition, project_version)
+
+    def resolve(self, roots: Iterable[PluginModDefinition]) -> DependencyResolution:
+        """Resolves `roots` and every dependency they transitively require
+
+        Args:
+            roots (Iterable[PluginModDefinition]): Plugins/mods to install
+
+        Returns:
+            DependencyResolution: The flattened install set, plus any conflicts and cycles found
+        """
+        resolution = DependencyResolution()
+        start_request_count = self.request_count
+
+        installed: Dict[Tuple[InstallGroup, str], PlannedDownload] = {}
+        edges: Dict[InstallGroup, Dict[str, List[str]]] = {}
+        pins: Dict[Tuple[InstallGroup, str], Dict[str, Set[str]]] = {}
+        seen: Set[Tuple[InstallGroup, str]] = set()
+
+        # (definition, project id that required it, pinned version id)
+        level: List[Tuple[PluginModDefinition, Optional[str], Optional[str]]] = []
+        for root in roots:
+            node = (_install_group(root), root.project_id)
+            if node not in seen:
+                seen.add(node)
+                level.append((root, None, None))
+
+        while level:
+            resolution.levels += 1
+            self._lookup(definition for definition, _, pin in level if pin is None)
+
+            resolved: List[Tuple[InstallGroup, PlannedDownload]] = []
+            for definition, required_by, pin in level:
+                if pin is not None:
+                    entry = self._resolve_pinned(definition, pin)
+                else:
+                    entry = self._memo[self._memo_key(definition)]
+                if isinstance(entry, str):
+                    if required_by is not None:
+                        entry = f"{entry} (required by '{required_by}')"
+                    resolution.plan.unresolved[definition.project_id] = entry
+                    continue
+
+                group = _install_group(definition)
+                node = (group, entry.project_id)
+                if node not in installed:
+                    installed[node] = replace(entry, definition=definition)
+                    resolved.append((group, installed[node]))
+
+            self._lookup_versions(
+                dependency["version_id"]
+                for _, download in resolved
+                for dependency in download.dependencies
+                if dependency.get("version_id")
+                and (
+                    dependency.get("dependency_type") == "required"
+                    or not dependency.get("project_id")
+                )
+            )
+
+            level = []
+            for group, download in resolved:
+                for dependency in download.dependencies:
+                    if dependency.get("dependency_type") != "required":
+                        continue
+                    project_id = self._dependency_project_id(dependency)
+                    if project_id is None:
+                        continue
+
+                    edges.setdefault(group, {}).setdefault(
+                        download.project_id, []
+                    ).append(project_id)
+                    resolution.required_by.setdefault(project_id, set()).add(
+                        download.project_id
+                    )
+                    pin = dependency.get("version_id")
+                    if pin:
+                        pins.setdefault((group, project_id), {}).setdefault(
+                            pin, set()
+                        ).add(download.project_id)
+
+                    node = (group, project_id)
+                    if node in seen:
+                        continue
+                    seen.add(node)
+                    level.append(
+                        (
+                            PluginModDefinition(
+                                project_id,
+                                download.definition.mod_mc_version,
+                                server_type=download.definition._server_type,
+                                env=download.definition._env,
+                            ),
+                            download.project_id,
+                            pin,
+                        )
+                    )
+
+        resolution.plan.downloads = list(installed.values())
+        resolution.plan.request_count = self.request_count - start_request_count
+
+        installed_versions = {
+            (group, download.version_id) for (group, _), download in installed.items()
+        }
+        for (group, _), download in installed.items():
+            where = f" in '{group[0]}'" if group[0] else ""
+            for dependency in download.dependencies:
+                if dependency.get("dependency_type") != "incompatible":
+                    continue
+                version_id = dependency.get("version_id")
+                other = self._dependency_project_id(dependency) or version_id
+                if version_id:
+                    clash = (group, version_id) in installed_versions
+                else:
+                    clash = (group, other) in installed
+                if clash:
+                    resolution.conflicts.append(
+                        f"'{download.project_id}' is incompatible with '{other}'{where}"
+                    )
+
+        for (group, project_id), pinned in pins.items():
+            where = f" in '{group[0]}'" if group[0] else ""
+            versions = ", ".join(
+                f"{version_id} (by {', '.join(sorted(by))})"
+                for version_id, by in sorted(pinned.items())
+            )
+            download = installed.get((group, project_id))
+            if len(pinned) > 1:
+                resolution.conflicts.append(
+                    f"'{project_id}' is pinned to different versions{where}: {versions}"
+                )
+            elif download is not None and download.version_id not in pinned:
+                resolution.conflicts.append(
+                    f"'{project_id}' is pinned to {versions}, but {download.version_id} is installed{where}"
+                )
+
+        found_cycles: Set[Tuple[str, ...]] = set()
+        for group_edges in edges.values():
+            for cycle in _find_cycles(group_edges):
+                if tuple(cycle) not in found_cycles:
+                    found_cycles.add(tuple(cycle))
+                    resolution.cycles.append(cycle)
+
+        return resolution
+
+
+def resolve_pluginmod_dependencies(
+    roots: Iterable[PluginModDefinition],
+) -> DependencyResolution:
+    """Resolves `roots` plus every dependency they transitively require. See `DependencyResolver`.
+
+    Args:
+        roots (Iterable[PluginModDefinition]): Plugins/mods to install
+
+    Returns:
+        DependencyResolution: The flattened install set, plus any conflicts and cycles found
+    """
+    return DependencyResolver().resolve(roots)
+
+
+def get_pluginmod_install_path(pluginmod_definition: PluginModDefinition) -> Path:
+    """Returns the directory a plugin/mod gets installed to in its env
+
+    Args:
+        pluginmod_definition (PluginModDefinition): Plugin/mod to install. Must have an env.
+
+    Returns:
+        Path: The env's velocity plugins, default plugins, or default mods dir depending on the loader
+    """
+    env_name = pluginmod_definition.env.name
+    loader = pluginmod_definition.loader
+    if loader == "velocity":
+        return server_paths.get_velocity_plugins_path(env_name)
+    if loader in PLUGIN_LOADERS:
+        return server_paths.get_env_default_plugins_path(env_name)
+    return server_paths.get_env_default_mods_path(env_name)
+
+
+def download_plan(
+    plan: DownloadPlan,
+    pipeline: Optional[DownloadPipeline] = None,
+    store: Optional[JarStore] = None,
+    install_path_fn: Optional[Callable[[PluginModDefinition], Path]] = None,
+) -> DownloadResult:
+    """Downloads every file in `plan` concurrently, then installs them into each env's plugin/mod dir
+
+    Files with a sha512 go through the jar store: each distinct jar not already stored is downloaded
+    once, then hardlinked into every env that wants it. Files without a sha512 are downloaded straight
+    into the env. Every download is verified against Modrinth's hashes; mismatches are reported as
+    failures in the result.
+
+    Args:
+        plan (DownloadPlan): Plan from `resolve_pluginmods()`
+        pipeline (Optional[DownloadPipeline]): Pipeline to run the downloads on, eg to set concurrency limits or cancel. Defaults to a new DownloadPipeline.
+        store (Optional[JarStore]): Jar store to use. Defaults to the one under `BASE_DATA_PATH`.
+        install_path_fn (Optional[Callable[[PluginModDefinition], Path]]): Returns the dir to install a definition's jar into. Defaults to `get_pluginmod_install_path()`.
+
+    Returns:
+        DownloadResult: What completed, failed, and was cancelled
+    """
+    pipeline = pipeline if pipeline is not None else DownloadPipeline()
+    store = store if store is not None else JarStore()
+    install_path_fn = (
+        install_path_fn if install_path_fn is not None else get_pluginmod_install_path
+    )
+
+    tasks: List[DownloadTask] = []
+    staged: Dict[str, Path] = {}
+    direct: Set[Path] = set()
+    for download in plan.downloads:
+        sha512 = download.hashes.get("sha512")
+        if sha512 is None:
+            dest = install_path_fn(download.definition) / download.filename
+            # Duplicate definitions in an env resolve to the same path, only download it once
+            if dest in direct:
+                continue
+            direct.add(dest)
+        elif sha512 not in staged and not store.has(sha512):
+            dest = staged[sha512] = store.staging_path(sha512)
+        else:
+            continue
+
+        tasks.append(
+            DownloadTask(
+                url=download.url,
+                dest=dest,
+                size=download.size,
+                label=f"{download.project_id} {download.version_number}",
+                hashes=download.hashes,
+            )
+        )
+
+    result = pipeline.run(tasks)
+
+    completed = {task.dest for task in result.completed}
+    for sha512, staging_path in staged.items():
+        if staging_path in completed:
+            store.add_file(staging_path, sha512, verify=False)
+
+    for download in plan.downloads:
+        sha512 = download.hashes.get("sha512")
+        if sha512 is not None and store.has(sha512):
+            store.install(
+                sha512,
+                install_path_fn(download.definition) / download.filename,
+            )
+
+    return result
+
+
+def download_mod(
+    pluginmod_definition: PluginModDefinition,
+    env_name: str,
+    store: Optional[JarStore] = None,
+):
     """Downloads the plugin/mod defined by `pluginmod_definition` to `env_name`'s defaultmods directory
 
+    If Modrinth provides a sha512 for the file, the jar comes from (or is added to) the jar store and
+    hardlinked into the env rather than downloaded again.
+
     Args:
         pluginmod_definition (PluginModDefinition): PluginMod to download
         env_name (str): Which env to download to
+        store (Optional[JarStore]): Jar store to use. Defaults to the one under `BASE_DATA_PATH`.
 
     Raises:
         RuntimeError: If the Modrinth response didn't include a `url` field in the `files` objects
@@ -106,7 +783,7 @@ def download_mod(pluginmod_definition: PluginModDefinition, env_name: str):
 
     mod_info = query_for_mod(pluginmod_definition)
 
-    file_data = mod_info["files"][0]
+    file_data = get_primary_file(mod_info)
     if "url" not in file_data:
         raise RuntimeError(
             "Got malformed response from Modrinth! Expected a 'url' field in the project download file data!"
@@ -118,10 +795,46 @@ def download_mod(pluginmod_definition: PluginModDefinition, env_name: str):
 
     filename = file_data["filename"]
     mod_dl_url = file_data["url"]
+    sha512 = file_data.get("hashes", {}).get("sha512")
 
     download_dest = server_paths.get_env_default_mods_path(env_name) / filename
-    logger.info(f">> Downloading from '{mod_dl_url}' to '{download_dest}'!")
-    urllib.request.urlretrieve(mod_dl_url, download_dest)
+    if sha512 is None:
+        logger.info(f">> Downloading from '{mod_dl_url}' to '{download_dest}'!")
+        http_client.download_file(
+            mod_dl_url, download_dest, hashes=file_data.get("hashes")
+        )
+        return
+
+    store = store if store is not None else JarStore()
+    if not store.has(sha512):
+        logger.info(f">> Downloading from '{mod_dl_url}' to the jar store!")
+        store.fetch(mod_dl_url, sha512)
+    logger.info(f">> Installing '{filename}' to '{download_dest}' from the jar store!")
+    store.install(sha512, download_dest)
+
+
+def select_project_version(
+    project_versions: List[Dict], mc_version: Optional[McVersion]
+) -> Dict:
+    """Picks the newest project version that supports `mc_version`
+
+    Modrinth lists project versions newest first. `game_versions` entries are compared as parsed
+    versions, so eg "1.20" matches "1.20.0". Falls back to the newest version if none match, or if
+    `mc_version` couldn't be parsed.
+
+    Args:
+        project_versions (List[Dict]): Modrinth project version objects, newest first
+        mc_version (Optional[McVersion]): Minecraft version to match
+
+    Returns:
+        Dict: The chosen project version object
+    """
+    if mc_version is not None:
+        for project_version in project_versions:
+            if mc_version in project_version.get("game_versions", ()):
+                return project_version
+
+    return project_versions[0]
 
 
 def query_for_mod(pluginmod_definition: PluginModDefinition):
@@ -137,28 +850,23 @@ def query_for_mod(pluginmod_definition: PluginModDefinition):
     Returns:
         Dict: The Modrinth API response object per https://docs.modrinth.com/api/operations/getprojectversions/
     """
-    fabric_proxy_url = MODRINTH_VERSION_URL_FMT.format(
+    version_path = MODRINTH_VERSION_PATH_FMT.format(
         project_id=pluginmod_definition.project_id,
         mc_version=pluginmod_definition.mod_mc_version,
         loader=pluginmod_definition.server_type,
     )
 
-    with requests.get(fabric_proxy_url) as r:
-        resp = r.json()
-        logger.info(fabric_proxy_url)
-        logger.info(pformat(resp))
-        if len(resp) == 0:
-            raise RuntimeError(
-                f"Modrinth API returned no valid downloads for project '{pluginmod_definition.project_id}'!"
-            )
+    resp = get_modrinth_backend().get_json(version_path)
+    logger.debug(f"Modrinth returned {len(resp)} versions for '{version_path}'")
+    if len(resp) == 0:
+        raise RuntimeError(
+            f"Modrinth API returned no valid downloads for project '{pluginmod_definition.project_id}'!"
+        )
 
-        project_version_data = resp[0]
-        if (
-            "files" not in project_version_data
-            or len(project_version_data["files"]) == 0
-        ):
-            raise RuntimeError(
-                "Got malformed response from Modrinth! Expected a 'files' field in the project version data!"
-            )
+    project_version_data = select_project_version(resp, pluginmod_definition.mc_version)
+    if "files" not in project_version_data or len(project_version_data["files"]) == 0:
+        raise RuntimeError(
+            "Got malformed response from Modrinth! Expected a 'files' field in the project version data!"
+        )
 
-        return project_version_data
+    return project_version_data
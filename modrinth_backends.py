@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from pathlib import Path
+from typing import Any, Optional
+
+from src.common import http_cache
+from src.common.logger_setup import logger
+
+MODRINTH_API_URL = os.getenv("MODRINTH_API_URL", "https://api.modrinth.com/v2")
+
+
+class ModrinthBackend:
+    """Where Modrinth API responses come from.
+
+    `modrinth.py` only ever asks its backend for API paths (eg, `/projects?ids=[...]`), so the live
+    API can be swapped for recorded fixtures or a local fake server. Jar downloads use the URLs in the
+    responses, so a backend pointing at a fake server also serves the jars.
+    """
+
+    def get_json(self, path: str) -> Any:
+        """Returns the decoded json response for an API path
+
+        Args:
+            path (str): API path including the query string. Eg, `/versions?ids=["AABBCCDD"]`
+
+        Returns:
+            Any: Decoded json
+        """
+        raise NotImplementedError
+
+
+class LiveModrinthBackend(ModrinthBackend):
+    """Talks to a Modrinth API over HTTP, through the shared HttpCache"""
+
+    base_url: str
+
+    def __init__(self, base_url: str = MODRINTH_API_URL):
+        """
+        Args:
+            base_url (str, optional): API root. Defaults to `MODRINTH_API_URL`, overridable with the env var of the same name.
+        """
+        self.base_url = base_url.rstrip("/")
+
+    def get_json(self, path: str) -> Any:
+        return http_cache.get_http_cache().get_json(self.base_url + path)
+
+
+class FixtureModrinthBackend(ModrinthBackend):
+    """Serves API responses from json fixtures on disk, optionally recording missing ones.
+
+    Each fixture is `{fixtures_dir}/{sha1 of path}.json` holding the path and its response. With
+    `record_from` set, paths without a fixture are fetched from that backend and saved, so a run
+    against the live API can be replayed offline later.
+    """
+
+    fixtures_dir: Path
+    record_from: Optional[ModrinthBackend]
+
+    def __init__(
+        self, fixtures_dir: Path, record_from: Optional[ModrinthBackend] = None
+    ):
+        """
+        Args:
+            fixtures_dir (Path): Directory holding the fixtures
+            record_from (Optional[ModrinthBackend]): Backend to fetch and record missing fixtures from. Defaults to None.
+        """
+        self.fixtures_dir = Path(fixtures_dir)
+        self.record_from = record_from
+
+    def fixture_path(self, path: str) -> Path:
+        return (
+            self.fixtures_dir / f"{hashlib.sha1(path.encode('utf8')).hexdigest()}.json"
+        )
+
+    def get_json(self, path: str) -> Any:
+        """Returns the recorded response for `path`
+
+        Raises:
+            RuntimeError: If there's no fixture for `path` and we aren't recording
+        """
+        fixture_path = self.fixture_path(path)
+        try:
+            with open(fixture_path, "r") as f:
+                return json.load(f)["response"]
+        except FileNotFoundError:
+            if self.record_from is None:
+                raise RuntimeError(f"No Modrinth fixture recorded for '{path}'!")
+
+        response = self.record_from.get_json(path)
+        logger.debug(f"Recording Modrinth fixture for '{path}'")
+        self.fixtures_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.fixtures_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"path": path, "response": response}, f, indent=2)
+            os.replace(tmp_path, fixture_path)
+        except:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return response
+
+
+__BACKEND: Optional[ModrinthBackend] = None
+__BACKEND_LOCK = threading.Lock()
+
+
+def get_modrinth_backend() -> ModrinthBackend:
+    """Returns the backend `modrinth.py` uses, defaulting to the live API
+
+    Returns:
+        ModrinthBackend: Current backend
+    """
+    global __BACKEND
+
+    backend = __BACKEND
+    if backend is not None:
+        return backend
+
+    with __BACKEND_LOCK:
+        if __BACKEND is None:
+            __BACKEND = LiveModrinthBackend()
+        return __BACKEND
+
+
+def set_modrinth_backend(backend: Optional[ModrinthBackend]):
+    """Swaps the backend `modrinth.py` uses. Pass None to go back to the live API.
+
+    Args:
+        backend (Optional[ModrinthBackend]): New backend
+    """
+    global __BACKEND
+
+    with __BACKEND_LOCK:
+        __BACKEND = backend
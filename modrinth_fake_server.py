@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+import zipfile
+
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, urlsplit
+
+from src.common.logger_setup import logger
+from src.common.modrinth_backends import LiveModrinthBackend
+
+JAR_ENTRY_DATE_TIME = (2024, 1, 1, 0, 0, 0)
+"""Fixed zip entry timestamp, so a jar rebuilt after falling out of the cache has the same hashes"""
+
+
+class FakeModrinthServer:
+    """In-process stand-in for the Modrinth API and CDN, serving synthetic projects and jars.
+
+    Serves the endpoints `modrinth.py` uses (`/v2/projects`, `/v2/versions`,
+    `/v2/project/{id}/version`) plus the jar files their responses point at, with ETags and HTTP Range
+    support. Every project supports every loader, and each of its versions targets one of
+    `game_versions` in turn, newest versions last.
+
+    Eg,
+        with FakeModrinthServer(num_projects=50) as server:
+            modrinth_backends.set_modrinth_backend(server.backend())
+            ...
+    """
+
+    num_projects: int
+    versions_per_project: int
+    """Popular real projects have hundreds of versions, which is what makes `/versions?ids=` costly"""
+    game_versions: Sequence[str]
+    loaders: Sequence[str]
+    jar_size: int
+    latency: float
+    """Seconds slept before answering each request, to simulate network round trips"""
+    dependencies_per_project: int
+    """Project `n` requires projects `n * d + 1` to `n * d + d`, making the projects a d-ary dependency tree"""
+
+    projects: Dict[str, Dict]
+    versions: Dict[str, Dict]
+    request_count: int
+    bytes_served: int
+
+    _server: Optional[ThreadingHTTPServer]
+    _thread: Optional[threading.Thread]
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        num_projects: int = 100,
+        versions_per_project: int = 200,
+        game_versions: Sequence[str] = ("1.19.4", "1.20.1", "1.20.4", "1.21.1"),
+        loaders: Sequence[str] = ("fabric", "forge", "paper"),
+        jar_size: int = 64 * 1024,
+        latency: float = 0.0,
+        dependencies_per_project: int = 0,
+    ):
+        self.num_projects = num_projects
+        self.versions_per_project = versions_per_project
+        self.game_versions = game_versions
+        self.loaders = loaders
+        self.jar_size = jar_size
+        self.latency = latency
+        self.dependencies_per_project = dependencies_per_project
+        self.projects = {}
+        self.versions = {}
+        self.request_count = 0
+        self.bytes_served = 0
+        self._server = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("FakeModrinthServer isn't running!")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.url}/v2"
+
+    @property
+    def project_ids(self) -> List[str]:
+        return list(self.projects)
+
+    def backend(self) -> LiveModrinthBackend:
+        """Returns a backend that talks to this server"""
+        return LiveModrinthBackend(self.api_url)
+
+    def start(self) -> "FakeModrinthServer":
+        """Starts serving on a free localhost port in a background thread"""
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._populate()
+
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="FakeModrinthServer", daemon=True
+        )
+        self._thread.start()
+        logger.debug(f"FakeModrinthServer listening on {self.url}")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeModrinthServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self.request_count = 0
+            self.bytes_served = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.request_count,
+                "bytes_served": self.bytes_served,
+            }
+
+    @lru_cache(maxsize=256)
+    def jar_bytes(self, version_id: str) -> bytes:
+        """Returns the (deterministic) jar served for `version_id`
+
+        It's a real jar with a `fabric.mod.json`, padded to roughly `jar_size` with random bytes
+        shared by every jar, so building one stays cheap.
+        """
+        version = self.versions[version_id]
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as jar:
+            jar.writestr(
+                zipfile.ZipInfo("fabric.mod.json", JAR_ENTRY_DATE_TIME),
+                json.dumps(
+                    {
+                        "name": self.projects[version["project_id"]]["title"],
+                        "version": version["version_number"],
+                        "id": version_id,
+                    }
+                ),
+            )
+            jar.writestr(
+                zipfile.ZipInfo("payload.bin", JAR_ENTRY_DATE_TIME),
+                self._payload(),
+            )
+        return buf.getvalue()
+
+    @lru_cache(maxsize=1)
+    def _payload(self) -> bytes:
+        return random.Random(0).randbytes(self.jar_size)
+
+    def _with_files(self, version: Dict) -> Dict:
+        """Fills in `version`'s file (and so builds its jar) the first time it's served"""
+        if version["files"]:
+            return version
+
+        version_id = version["id"]
+        content = self.jar_bytes(version_id)
+        filename = f"{self.projects[version['project_id']]['slug']}-{version['version_number']}.jar"
+        version["files"] = [
+            {
+                "url": f"{self.url}/files/{version_id}/{filename}",
+                "filename": filename,
+                "primary": True,
+                "size": len(content),
+                "hashes": {
+                    "sha1": hashlib.sha1(content).hexdigest(),
+                    "sha512": hashlib.sha512(content).hexdigest(),
+                },
+            }
+        ]
+        return version
+
+    def _populate(self):
+        self.projects.clear()
+        self.versions.clear()
+        for p in range(self.num_projects):
+            project_id = f"P{p:07d}"
+            slug = f"fake-project-{p}"
+            d = self.dependencies_per_project
+            dependencies = [
+                {
+                    "project_id": f"P{child:07d}",
+                    "version_id": None,
+                    "file_name": None,
+                    "dependency_type": "required",
+                }
+                for child in range(p * d + 1, min(p * d + d + 1, self.num_projects))
+            ]
+            version_ids = []
+            for v in range(self.versions_per_project):
+                version_id = f"V{p:04d}{v:03d}"
+                version_ids.append(version_id)
+                self.versions[version_id] = {
+                    "id": version_id,
+                    "project_id": project_id,
+                    "name": f"{slug} {v}.0.0",
+                    "version_number": f"{v}.0.0",
+                    "version_type": "release",
+                    "loaders": list(self.loaders),
+                    "game_versions": [self.game_versions[v % len(self.game_versions)]],
+                    "date_published": f"2024-01-01T00:{v // 60:02d}:{v % 60:02d}Z",
+                    "files": [],
+                    "dependencies": dependencies,
+                }
+            self.projects[project_id] = {
+                "id": project_id,
+                "slug": slug,
+                "title": slug,
+                "loaders": list(self.loaders),
+                "game_versions": list(self.game_versions),
+                "versions": version_ids,
+            }
+
+    def _api_response(self, path: str, query: Dict[str, List[str]]) -> Optional[List]:
+        def json_param(name: str) -> List[str]:
+            return json.loads(query[name][0]) if name in query else []
+
+        if path == "/v2/projects":
+            return [self.projects[i] for i in json_param("ids") if i in self.projects]
+        if path == "/v2/versions":
+            return [
+                self._with_files(self.versions[i])
+                for i in json_param("ids")
+                if i in self.versions
+            ]
+
+        parts = path.split("/")
+        if len(parts) == 5 and parts[2] == "project" and parts[4] == "version":
+            project = self.projects.get(parts[3]) or next(
+                (p for p in self.projects.values() if p["slug"] == parts[3]), None
+            )
+            if project is None:
+                return None
+            game_versions = json_param("game_versions")
+            loaders = json_param("loaders")
+            matches = [
+                self._with_files(self.versions[i])
+                for i in reversed(project["versions"])
+                if (
+                    not game_versions
+                    or set(game_versions) & set(self.versions[i]["game_versions"])
+                )
+                and (not loaders or set(loaders) & set(self.versions[i]["loaders"]))
+            ]
+            return matches
+        return None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(
+                self,
+                status: int,
+                body: bytes = b"",
+                headers: Optional[Dict[str, str]] = None,
+            ):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.bytes_served += len(body)
+
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                url = urlsplit(self.path)
+                if url.path.startswith("/files/"):
+                    return self._send_file(url.path.split("/")[2])
+
+                response = server._api_response(url.path, parse_qs(url.query))
+                if response is None:
+                    return self._send(404)
+
+                body = json.dumps(response).encode("utf8")
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(304, headers={"ETag": etag})
+                self._send(
+                    200,
+                    body,
+                    {"Content-Type": "application/json", "ETag": etag},
+                )
+
+            def _send_file(self, version_id: str):
+                if version_id not in server.versions:
+                    return self._send(404)
+
+                content = server.jar_bytes(version_id)
+                range_header = self.headers.get("Range", "")
+                if range_header.startswith("bytes="):
+                    start = int(range_header[len("bytes=") :].split("-")[0])
+                    if start >= len(content):
+                        return self._send(416)
+                    return self._send(
+                        206,
+                        content[start:],
+                        {
+                            "Content-Range": f"bytes {start}-{len(content) - 1}/{len(content)}"
+                        },
+                    )
+                self._send(200, content, {"Content-Type": "application/java-archive"})
+
+        return Handler
@@ -92,6 +92,17 @@ def get_rcon_password_file_path() -> Path:
 ##
 
 
+def get_jar_store_path() -> Path:
+    """Get the path of the content-addressed plugin/mod jar store shared by every env.
+
+    Equivalent to `{constants.BASE_DATA_PATH}/jarstore`
+
+    Returns:
+        Path: Jar store path
+    """
+    return BASE_DATA_PATH / "jarstore"
+
+
 def get_env_data_path(env_str: str) -> Path:
     """Get the base data path for a given `env`.
 
@@ -1,16 +1,16 @@
 import shutil
 
-import requests
-
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 from src.common.helpers import log_exception, write_config
 from src.common.config import load_yaml_config
 from src.common.config.yaml_config import YamlConfig
 from src.common.constants import VELOCITY_FORWARDING_SECRET_PATH
+from src.common.downloader import DownloadPipeline
 from src.common.logger_setup import logger
-from src.common import jar_utils, modrinth, server_paths
+from src.common.mc_version import McVersion
+from src.common import http_client, jar_store, jar_utils, modrinth, server_paths
 
 from src.common.environment import Env
 
@@ -36,14 +36,15 @@ def perform_only_once_actions(target_env: Env):
 def write_paper_bukkit_configs(target_env: Env):
     logger.info(f"Writing paper/bukkit configs for env: '{target_env.name}'")
 
-    if target_env.server_version >= "1.19":
+    mc_version = target_env.mc_version
+    if mc_version is not None and mc_version >= MINIMUM_VERSION_FOR_PAPER_GLOBAL:
         # Versions before 1.19 did not have a paper-global.yml
         write_default_paper_global_yml_config(target_env)
 
     write_default_bukkit_yml_config(target_env)
 
 
-MINIMUM_VERSION_FOR_PAPER_GLOBAL = "1.19"
+MINIMUM_VERSION_FOR_PAPER_GLOBAL = McVersion("1.19")
 default_configs_repo_url_fmt = "https://raw.githubusercontent.com/dayyeeet/minecraft-default-configs/refs/heads/main/{server_version}"
 default_paper_global_url_fmt = f"{default_configs_repo_url_fmt}/paper-global.yml"
 default_paper_world_defaults_url_fmt = (
@@ -60,7 +61,8 @@ def get_paper_global_template_content(target_env: Env):
     Raises:
         RuntimeError: If supplied `target_env`'s server version is too low
     """
-    if target_env.server_version < MINIMUM_VERSION_FOR_PAPER_GLOBAL:
+    mc_version = target_env.mc_version
+    if mc_version is None or mc_version < MINIMUM_VERSION_FOR_PAPER_GLOBAL:
         raise RuntimeError(
             f"Tried getting default paper-global.yml file for a version that doesn't have that file! Got '{target_env.server_version}'"
         )
@@ -68,7 +70,7 @@ def get_paper_global_template_content(target_env: Env):
     default_paper_global_url = default_paper_global_url_fmt.format(
         server_version=target_env.server_version
     )
-    with requests.get(default_paper_global_url) as r:
+    with http_client.get(default_paper_global_url) as r:
         return r.text
 
 
@@ -148,11 +150,30 @@ def write_fabric_proxy_files(env: Env):
     if not fabric_proxy_version:
         fabric_proxy_version = env.cluster_vars.get("MC_VERSION", "no-mc-version-found")
 
+    # Fast path - the jar Modrinth says we want is already installed, unchanged. The version list
+    # comes from the HTTP cache and the jar's hash from the file hash cache, so this is usually free.
+    mod_info = modrinth.query_for_mod(
+        modrinth.PluginModDefinition(
+            modrinth.FABRICPROXY_LITE_PROJECT_ID,
+            fabric_proxy_version,
+            env=env,
+        )
+    )
+    mods_path = server_paths.get_env_default_mods_path(env.name)
+    expected_path = mods_path / modrinth.get_primary_file(mod_info).get("filename", "")
+    if expected_path.is_file() and is_jar_up_to_date(expected_path, mod_info):
+        logger.info("Found an existing FabricProxy-Lite with correct version.")
+        return
+
+    # Reuse `mod_info` below rather than querying again. If the installed jar is the one we just
+    # checked, we already know it's out of date.
     jar_path = get_proxy_jar_path(env)
     if not jar_path:
         logger.info("Could not find an existing FabricProxy-Lite. Downloading now.")
         download_fabric_proxy_files(env, fabric_proxy_version)
-    elif not is_proxy_jar_correct_version(jar_path, env, fabric_proxy_version):
+    elif jar_path == expected_path or not is_proxy_jar_correct_version(
+        jar_path, env, fabric_proxy_version, mod_info
+    ):
         logger.info(
             "Found an existing FabricProxy-Lite with incorrect version. Deleting and redownloading correct version."
         )
@@ -182,31 +203,58 @@ def get_proxy_jar_path(env: Env) -> Optional[Path]:
     return None
 
 
+def is_jar_up_to_date(jar_path: Path, mod_info: Dict) -> bool:
+    """Checks whether the jar at `jar_path` is the file of the Modrinth project version `mod_info`
+
+    Compares the jar's (cached) sha512 against the hash Modrinth lists for the version's primary file,
+    falling back to comparing the version name with the version inside the jar if there's no hash.
+
+    Args:
+        jar_path (Path): Installed jar
+        mod_info (Dict): Modrinth project version object, eg from `modrinth.query_for_mod()`
+
+    Returns:
+        bool: True if the jar matches
+    """
+    expected_sha512 = (
+        modrinth.get_primary_file(mod_info).get("hashes", {}).get("sha512")
+    )
+    if expected_sha512 is not None:
+        return jar_store.cached_sha512(jar_path) == expected_sha512.lower()
+
+    return mod_info["name"] == jar_utils.get_pluginmod_version(jar_path)
+
+
 def is_proxy_jar_correct_version(
-    jar_path: Path, env: Env, fabric_proxy_version: str
+    jar_path: Path,
+    env: Env,
+    fabric_proxy_version: str,
+    mod_info: Optional[Dict] = None,
 ) -> bool:
     """Checks if the existing Fabric Proxy jar version in `env` matches the expected `fabric_proxy_version`.
 
+    Only hits the network if `mod_info` isn't given and the cached Modrinth version list is stale.
+    See `is_jar_up_to_date()`.
+
     Args:
         jar_path (Path): Path to the FabricProxy jar
         env (Env): The env this is in
         fabric_proxy_version (str): The desired version of the Fabric Proxy
+        mod_info (Optional[Dict]): Already fetched Modrinth project version for `fabric_proxy_version`. Defaults to querying for it.
 
     Returns:
         bool: True if the existing jar version matches `fabric_proxy_version`. False otherwise.
     """
-    mod_info = modrinth.query_for_mod(
-        modrinth.PluginModDefinition(
-            modrinth.FABRICPROXY_LITE_PROJECT_ID,
-            fabric_proxy_version,
-            env=env,
+    if mod_info is None:
+        mod_info = modrinth.query_for_mod(
+            modrinth.PluginModDefinition(
+                modrinth.FABRICPROXY_LITE_PROJECT_ID,
+                fabric_proxy_version,
+                env=env,
+            )
         )
-    )
 
-    expected_version = mod_info["name"]
-    current_version = jar_utils.get_pluginmod_version(jar_path)
-
-    return expected_version == current_version
+    return is_jar_up_to_date(jar_path, mod_info)
 
 
 def download_fabric_proxy_files(env: Env, fabric_proxy_version: str):
@@ -226,5 +274,53 @@ def download_fabric_proxy_files(env: Env, fabric_proxy_version: str):
     )
 
 
-def download_modrinth_pluginmods() -> None:
-    pass
+def download_modrinth_pluginmods(
+    pluginmod_definitions: List[modrinth.PluginModDefinition],
+    pipeline: Optional[DownloadPipeline] = None,
+    dry_run: bool = False,
+    resolve_dependencies: bool = True,
+) -> modrinth.DownloadPlan:
+    """Resolves `pluginmod_definitions` in bulk, then downloads them concurrently into their envs.
+
+    Args:
+        pluginmod_definitions (List[modrinth.PluginModDefinition]): Plugins/mods to install. Each must have an env.
+        pipeline (Optional[DownloadPipeline]): Pipeline to download with, eg to set concurrency limits or cancel. Defaults to a new DownloadPipeline.
+        dry_run (bool, optional): Only resolve, don't download anything. Defaults to False.
+        resolve_dependencies (bool, optional): Also install the dependencies each plugin/mod requires, transitively. Defaults to True.
+
+    Raises:
+        RuntimeError: If the resolved plugins/mods conflict with each other
+        RuntimeError: If any download failed or was cancelled
+
+    Returns:
+        modrinth.DownloadPlan: Resolved downloads, plus any definitions that couldn't be resolved
+    """
+    if resolve_dependencies:
+        resolution = modrinth.resolve_pluginmod_dependencies(pluginmod_definitions)
+        plan = resolution.plan
+        for cycle in resolution.cycles:
+            logger.warning(f"Modrinth dependency cycle: {' -> '.join(cycle)}")
+        for conflict in resolution.conflicts:
+            logger.error(f"Modrinth dependency conflict: {conflict}")
+    else:
+        resolution = None
+        plan = modrinth.resolve_pluginmods(pluginmod_definitions)
+    logger.info(
+        f"Resolved {len(plan.downloads)} plugins/mods for {len(pluginmod_definitions)} definitions "
+        f"in {plan.request_count} Modrinth requests"
+    )
+    for project_id, reason in plan.unresolved.items():
+        logger.warning(f"Could not resolve Modrinth project '{project_id}': {reason}")
+
+    if dry_run:
+        return plan
+    if resolution is not None:
+        resolution.raise_for_conflicts()
+
+    result = modrinth.download_plan(plan, pipeline)
+    logger.info(
+        f"Downloaded {len(result.completed)}/{len(plan.downloads)} plugins/mods "
+        f"({result.downloaded_bytes} bytes) in {result.elapsed:.2f}s"
+    )
+    result.raise_for_errors()
+    return plan